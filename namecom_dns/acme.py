@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# Description: Publish and clean up ACME DNS-01 challenge TXT records for many names at once
+
+from namecom_dns.namecom import NameCom, get_resource_record
+from concurrent.futures import ThreadPoolExecutor
+import requests
+import argparse
+import json
+import os
+import sys
+import time
+import logging
+
+# Create a logger object
+logger = logging.getLogger(__name__)
+# Set log level
+logger.setLevel(logging.INFO)
+
+CHALLENGE_LABEL = "_acme-challenge"
+
+# Seconds to wait, once for the whole batch, after the records are confirmed, for them to reach the Name.com name servers
+DEFAULT_PROPAGATION_DELAY = 60
+
+# Seconds to keep checking for records that are not listed yet, and the seconds between the checks
+DEFAULT_CONFIRM_TIMEOUT = 120
+CONFIRM_POLL_INTERVAL = 5
+
+
+def find_zone(name, domains):
+    """
+    Return the domain in domains that name belongs to, the longest one if several match.
+    """
+    name = name.rstrip(".").lower()
+    if name.startswith("*."):
+        name = name[2:] # Wildcard certificates are validated on the base name
+    matches = [domain for domain in domains if name == domain.lower() or name.endswith("." + domain.lower())]
+    if not matches:
+        raise ValueError(f"{name} is not in any of the domains {', '.join(domains)}")
+    domain = max(matches, key=len)
+    return domain, name[:-len(domain)].rstrip(".")
+
+
+def challenge_host(host):
+    """
+    Return the host of the challenge TXT record for a host relative to its domain.
+    """
+    if host:
+        return f"{CHALLENGE_LABEL}.{host}"
+    return CHALLENGE_LABEL
+
+
+class ChallengeBatch:
+    """
+    A batch of DNS-01 challenges across any number of domains.
+
+    All TXT records are created concurrently by publish(), wait() lists each domain until all records are confirmed
+    and then waits out a single propagation delay for the whole batch, and cleanup() deletes them concurrently.
+    """
+
+    def __init__(self, api_username, api_token, domains, workers=16):
+        self.api_username = api_username
+        self.api_token = api_token
+        self.domains = list(domains)
+        self.workers = workers
+        self.clients = {}
+        # Published records as dicts with domain, host, answer and id
+        self.records = []
+
+    def client(self, domain):
+        if domain not in self.clients:
+            # As many connections as workers, so that no worker waits for a free one
+            self.clients[domain] = NameCom(self.api_username, self.api_token, domain, "", connections=self.workers)
+        return self.clients[domain]
+
+    def publish(self, challenges):
+        """
+        Create a TXT record for each (name, validation) pair. Return the list of names that failed.
+        """
+        pending = []
+        for name, validation in challenges:
+            domain, host = find_zone(name, self.domains)
+            pending.append({"name": name, "domain": domain, "host": challenge_host(host), "answer": validation})
+        for domain in {record["domain"] for record in pending}:
+            self.client(domain) # Create the clients before they are shared by the worker threads
+
+        def create(record):
+            data = get_resource_record(id=0, host=record["host"], ip=record["answer"], type="TXT")
+            try:
+                return self.client(record["domain"]).create_resource_record(data)
+            except requests.RequestException as e:
+                logger.info(f"Error: creating {record['host']}.{record['domain']} failed: {e}")
+                return None
+
+        failed = []
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for record, id in zip(pending, executor.map(create, pending)):
+                if id is None:
+                    failed.append(record["name"])
+                else:
+                    record["id"] = id
+                    self.records.append(record)
+        logger.info(f"Published {len(self.records)} challenge records, {len(failed)} failed")
+        return failed
+
+    def confirm(self):
+        """
+        Return the published records that are missing from the record listings of their domains.
+        """
+        missing = []
+        for domain in {record["domain"] for record in self.records}:
+            ids = {record["id"] for record in self.client(domain).iter_records()}
+            missing += [record for record in self.records if record["domain"] == domain and record["id"] not in ids]
+        return missing
+
+    def wait(self, propagation_delay=DEFAULT_PROPAGATION_DELAY, confirm_timeout=DEFAULT_CONFIRM_TIMEOUT):
+        """
+        Wait until all published records are listed, or confirm_timeout seconds have passed, and then wait once
+        for the whole batch to propagate. Return the records that could not be confirmed.
+        """
+        deadline = time.monotonic() + confirm_timeout
+        missing = self.confirm()
+        while missing and time.monotonic() < deadline:
+            logger.info(f"Waiting for {len(missing)} challenge records to be listed")
+            time.sleep(min(CONFIRM_POLL_INTERVAL, max(deadline - time.monotonic(), 0)))
+            missing = self.confirm()
+        for record in missing:
+            logger.info(f"Error: challenge record {record['host']}.{record['domain']} is missing")
+        time.sleep(propagation_delay)
+        return missing
+
+    def cleanup(self):
+        """
+        Delete all published records. Return the records that could not be deleted, they are kept for a retry.
+        """
+        for domain in {record["domain"] for record in self.records}:
+            self.client(domain)
+
+        def delete(record):
+            try:
+                return self.client(record["domain"]).delete_record(record["id"])
+            except requests.RequestException as e:
+                logger.info(f"Error: deleting {record['host']}.{record['domain']} failed: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = list(executor.map(delete, self.records))
+        self.records = [record for record, deleted in zip(self.records, results) if not deleted]
+        logger.info(f"Cleaned up challenge records, {len(self.records)} failed")
+        return self.records
+
+    def save(self, path):
+        with open(path, "w") as state:
+            json.dump({"domains": self.domains, "records": self.records}, state, indent=2)
+
+    def load(self, path):
+        with open(path) as state:
+            data = json.load(state)
+        self.domains = data["domains"]
+        self.records = data["records"]
+
+
+def read_challenges(lines):
+    """
+    Yield (name, validation) pairs from lines of "name validation".
+    """
+    for line in lines:
+        fields = line.split()
+        if len(fields) == 2:
+            yield fields[0], fields[1]
+        elif fields:
+            raise ValueError(f"Expected 'name validation', got: {line.strip()}")
+
+
+def main():
+    # Define and parse command-line arguments
+    parser = argparse.ArgumentParser(description="Publish or clean up ACME DNS-01 challenge records for many names at once")
+    parser.add_argument("command", choices=["publish", "cleanup"],
+                        help="publish: create the challenges read as 'name validation' lines from stdin and wait for them. cleanup: delete the records in the state file")
+    parser.add_argument("-d", "--domain", action="append", default=[], help="Domain the names belong to, may be given several times")
+    parser.add_argument("-s", "--state", type=str, required=True, help="File recording the published records for the cleanup")
+    parser.add_argument("-w", "--wait", type=int, default=DEFAULT_PROPAGATION_DELAY, help="Seconds to wait for the records to propagate")
+    parser.add_argument("--confirm-timeout", type=int, default=DEFAULT_CONFIRM_TIMEOUT, help="Seconds to wait for the records to be listed by the API")
+    parser.add_argument("--workers", type=int, default=16, help="Number of concurrent API requests")
+
+    args = parser.parse_args()
+
+    # Name.com API credentials
+    APIUSERNAME_VAR = "NAMECOM_APIUSERNAME"
+    APITOKEN_VAR = "NAMECOM_APITOKEN"
+
+    api_username = os.environ.get(APIUSERNAME_VAR)
+    api_token = os.environ.get(APITOKEN_VAR)
+    if not api_username or not api_token:
+        print(f"Error: Environment variables {APIUSERNAME_VAR} and {APITOKEN_VAR} must be set.", file=sys.stderr)
+        sys.exit(1)
+
+    batch = ChallengeBatch(api_username, api_token, args.domain, args.workers)
+
+    if args.command == "publish":
+        if not args.domain:
+            print("Error: At least one --domain is required.", file=sys.stderr)
+            sys.exit(1)
+        failed = batch.publish(read_challenges(sys.stdin))
+        batch.save(args.state)
+        missing = batch.wait(args.wait, args.confirm_timeout)
+        for name in failed:
+            print(f"Failed to publish the challenge for {name}", file=sys.stderr)
+        sys.exit(1 if failed or missing else 0)
+
+    batch.load(args.state)
+    remaining = batch.cleanup()
+    batch.save(args.state)
+    for record in remaining:
+        print(f"Failed to delete {record['host']}.{record['domain']}", file=sys.stderr)
+    sys.exit(1 if remaining else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# Description: Read the namecom_dns.cfg settings file and watch it for changes
+
+import os
+import re
+import shlex
+import logging
+
+# Create a logger object
+logger = logging.getLogger(__name__)
+# Set log level
+logger.setLevel(logging.INFO)
+
+ASSIGNMENT = re.compile(r"^\s*(?:export\s+)?([A-Za-z_][A-Za-z0-9_]*)=(.*)$")
+
+
+def read_config(path):
+    """
+    Return the KEY=VALUE settings of a shell style configuration file such as namecom_dns.cfg as a dict.
+    Values are unquoted and trailing comments are removed, the same way bash 'source' would read them.
+    """
+    config = {}
+    with open(path) as cfg:
+        for number, line in enumerate(cfg, start=1):
+            if not line.strip() or line.lstrip().startswith("#"):
+                continue
+            match = ASSIGNMENT.match(line)
+            if not match:
+                logger.info(f"Ignoring line {number} of {path}: {line.strip()}")
+                continue
+            key, value = match.groups()
+            config[key] = " ".join(shlex.split(value, comments=True))
+    return config
+
+
+class ConfigWatcher:
+    """
+    Watch a configuration file by polling its modification time and size.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.stamp = None
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def changed(self):
+        return self._stat() != self.stamp
+
+    def poll(self):
+        """
+        Return the configuration if the file changed since the last poll, otherwise None.
+        A file that is missing or cannot be parsed is logged and otherwise ignored, the previous configuration stays in use.
+        """
+        stamp = self._stat()
+        if stamp == self.stamp:
+            return None
+        self.stamp = stamp
+        if stamp is None:
+            logger.info(f"Error: Configuration file {self.path} is missing")
+            return None
+        try:
+            return read_config(self.path)
+        except (OSError, ValueError) as e:
+            logger.info(f"Error: Could not read configuration file {self.path}: {e}")
+            return None
@@ -0,0 +1,216 @@
+# Description: Compact append-only store of IP address changes, with fast time range and point in time queries
+
+from datetime import datetime
+import argparse
+import ipaddress
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+
+MAGIC = b"NCHIST\x00\x01"
+HEADER = struct.Struct("<8sII") # magic, version, entry size
+VERSION = 2
+# Timestamp in microseconds, target, old and new address (IPv4 addresses IPv4-mapped), API latency in milliseconds, outcome
+ENTRY = struct.Struct("<q256s16s16sfB3x")
+TARGET_SIZE = 256 # Room for any DNS name, those are at most 253 bytes
+
+OUTCOME_UPDATED = 1
+OUTCOME_CREATED = 2
+OUTCOME_FAILED = 3
+OUTCOME_NAMES = {OUTCOME_UPDATED: "updated", OUTCOME_CREATED: "created", OUTCOME_FAILED: "failed"}
+
+
+def pack_address(address):
+    if not address:
+        return bytes(16)
+    ip = ipaddress.ip_address(address)
+    if ip.version == 4:
+        ip = ipaddress.IPv6Address(b"\x00" * 10 + b"\xff\xff" + ip.packed)
+    return ip.packed
+
+
+def unpack_address(packed):
+    if packed == bytes(16):
+        return ""
+    ip = ipaddress.IPv6Address(packed)
+    return str(ip.ipv4_mapped or ip)
+
+
+class HistoryEntry:
+    """
+    One change of the address of a target.
+    """
+
+    def __init__(self, timestamp, target, old_ip, new_ip, latency, outcome):
+        self.timestamp = timestamp # Seconds since the epoch
+        self.target = target
+        self.old_ip = old_ip
+        self.new_ip = new_ip
+        self.latency = latency     # Milliseconds the API request took
+        self.outcome = outcome
+
+    def __repr__(self):
+        return (f"HistoryEntry({self.timestamp!r}, {self.target!r}, {self.old_ip!r}, {self.new_ip!r}, "
+                f"{self.latency!r}, {self.outcome!r})")
+
+    def __eq__(self, other):
+        return isinstance(other, HistoryEntry) and vars(self) == vars(other)
+
+    def __str__(self):
+        when = datetime.fromtimestamp(self.timestamp).isoformat(sep=" ", timespec="seconds")
+        outcome = OUTCOME_NAMES.get(self.outcome, str(self.outcome))
+        return f"{when} {self.target} {self.old_ip or '-'} -> {self.new_ip} {outcome} {self.latency:.0f} ms"
+
+
+class HistoryWriter:
+    """
+    Append entries to a history file, creating it if needed.
+    Timestamps never decrease, so that the file stays sorted by time when the clock is stepped back.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "ab")
+        if self._file.tell() < HEADER.size:
+            # Empty, or the header was only partly written when the process stopped
+            self._file.truncate(0)
+            self._file.seek(0)
+        # Drop an entry that was only partly written when the process stopped
+        partial = (self._file.tell() - HEADER.size) % ENTRY.size if self._file.tell() > HEADER.size else 0
+        if partial:
+            self._file.truncate(self._file.tell() - partial)
+            self._file.seek(0, os.SEEK_END)
+        if self._file.tell() == 0:
+            self._file.write(HEADER.pack(MAGIC, VERSION, ENTRY.size))
+            self._file.flush()
+            self._last = 0
+        else:
+            with HistoryReader(path) as reader:
+                self._last = reader.timestamp(len(reader) - 1) if len(reader) else 0
+
+    def append(self, target, old_ip, new_ip, latency, outcome, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time()
+        encoded = target.encode("utf-8")
+        if len(encoded) > TARGET_SIZE:
+            raise ValueError(f"Target {target} is longer than {TARGET_SIZE} bytes")
+        with self._lock:
+            self._last = max(self._last, int(timestamp * 1_000_000))
+            self._file.write(ENTRY.pack(self._last, encoded, pack_address(old_ip), pack_address(new_ip), latency, outcome))
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class HistoryReader:
+    """
+    Read a history file through a memory map. Entries have a fixed size and are sorted by time,
+    so the file is its own time index: range and point in time queries are binary searches.
+    There is no index by target, a query for one target reads the entries of the time range it covers.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < HEADER.size:
+            self._file.close()
+            raise ValueError(f"{path} is not a history file")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, entry_size = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION or entry_size != ENTRY.size:
+            raise ValueError(f"{path} is not a version {VERSION} history file")
+        # An entry that is still being written is ignored
+        self._count = (size - HEADER.size) // ENTRY.size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __len__(self):
+        return self._count
+
+    def timestamp(self, index):
+        return struct.unpack_from("<q", self._map, HEADER.size + index * ENTRY.size)[0]
+
+    def entry(self, index):
+        timestamp, target, old_ip, new_ip, latency, outcome = ENTRY.unpack_from(self._map, HEADER.size + index * ENTRY.size)
+        return HistoryEntry(timestamp / 1_000_000, target.rstrip(b"\x00").decode("utf-8"),
+                            unpack_address(old_ip), unpack_address(new_ip), latency, outcome)
+
+    def bisect(self, timestamp, right=True):
+        """
+        Return the index of the first entry later than timestamp, or with right=False the first one at or later than it.
+        """
+        key = int(timestamp * 1_000_000)
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self.timestamp(middle) < key or (right and self.timestamp(middle) == key):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def range(self, start=None, end=None, target=None):
+        """
+        Yield the entries from start up to and including end, optionally of one target only.
+        """
+        first = 0 if start is None else self.bisect(start, right=False)
+        last = self._count if end is None else self.bisect(end)
+        for index in range(first, last):
+            entry = self.entry(index)
+            if target is None or entry.target == target:
+                yield entry
+
+    def at(self, timestamp, target=None):
+        """
+        Return the latest entry at or before timestamp, optionally of one target only, or None.
+        Its new_ip is the address at that time.
+        """
+        for index in range(self.bisect(timestamp) - 1, -1, -1):
+            entry = self.entry(index)
+            if target is None or entry.target == target:
+                return entry
+        return None
+
+
+def parse_time(value):
+    """
+    Return the seconds since the epoch of an ISO 8601 time, local time unless a time zone is given.
+    """
+    return datetime.fromisoformat(value).timestamp()
+
+
+def main(argv=None):
+    # Define and parse command-line arguments
+    parser = argparse.ArgumentParser(prog="namecom_dns history", description="Query the IP address change history")
+    parser.add_argument("file", help="History file written with --history")
+    parser.add_argument("--at", type=parse_time, help="Show the address at this time, e.g. 2024-05-01T03:12")
+    parser.add_argument("--from", dest="start", type=parse_time, help="Show changes from this time")
+    parser.add_argument("--to", dest="end", type=parse_time, help="Show changes up to this time")
+    parser.add_argument("--target", help="Only this target, e.g. www.example.com")
+
+    args = parser.parse_args(argv)
+
+    with HistoryReader(args.file) as reader:
+        if args.at is not None:
+            entry = reader.at(args.at, args.target)
+            if entry is None:
+                print("No address recorded at that time", file=sys.stderr)
+                sys.exit(1)
+            print(entry)
+        else:
+            for entry in reader.range(args.start, args.end, args.target):
+                print(entry)
+    sys.exit(0)
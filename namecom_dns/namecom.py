@@ -1,6 +1,11 @@
+from namecom_dns.resolver import create_session, prewarm
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 import requests
+import asyncio
 import base64
+import hashlib
 import logging
+import threading
 
 # Create a logger object
 logger = logging.getLogger(__name__)
@@ -19,8 +24,143 @@ def log_method_args(method):
         return result
     return wrapper
 
-def get_resource_record(id = 0, host='', ip=''):
-    # Define the data for updating an "A" record
+class _Call:
+    """
+    An in-flight call shared by all callers of SingleFlight.do with the same key.
+    """
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical calls: while a call for a key is in flight, further callers with the
+    same key wait for it and receive its result (or exception) instead of issuing their own call.
+    Nothing is cached, once the call completes the next caller starts a new one.
+    do() is for threads and do_async() is for asyncio tasks.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._async_calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    async def do_async(self, key, coro_fn):
+        loop = asyncio.get_running_loop()
+        loop_key = (loop, key) # Tasks can only be awaited in the loop they belong to
+        with self._lock:
+            task = self._async_calls.get(loop_key)
+            if task is None:
+                # The call runs as its own task, so that cancelling one caller does not cancel it for the others
+                task = asyncio.ensure_future(coro_fn())
+                self._async_calls[loop_key] = task
+                task.add_done_callback(lambda done: self._forget_async(loop_key, done))
+        return await asyncio.shield(task)
+
+    def _forget_async(self, loop_key, task):
+        with self._lock:
+            if self._async_calls.get(loop_key) is task:
+                del self._async_calls[loop_key]
+        if not task.cancelled():
+            task.exception() # Mark as retrieved, there may be no callers left to await it
+
+
+class ZoneCache:
+    """
+    The last record listing of a zone, with the validators to ask the server whether it changed since.
+    """
+
+    def __init__(self, records, digest, etag=None, last_modified=None):
+        self.records = records
+        self.digest = digest # SHA-256 of the response body, for servers that do not support conditional requests
+        self.etag = etag
+        self.last_modified = last_modified
+
+
+class RecordOperation:
+    """
+    One create, update or delete of a record for NameCom.apply_batch. record is a resource record dict, see get_resource_record.
+    """
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"
+
+    def __init__(self, action, record=None, id=None):
+        if action not in (self.CREATE, self.UPDATE, self.DELETE):
+            raise ValueError(f"Unknown record operation {action!r}")
+        if action != self.DELETE and record is None:
+            raise ValueError(f"A {action} operation needs a record")
+        if action != self.CREATE and not id:
+            raise ValueError(f"A {action} operation needs a record id")
+        self.action = action
+        self.record = record
+        self.id = id
+
+    @classmethod
+    def create(cls, record):
+        return cls(cls.CREATE, record=record)
+
+    @classmethod
+    def update(cls, id, record):
+        return cls(cls.UPDATE, record=record, id=id)
+
+    @classmethod
+    def delete(cls, id):
+        return cls(cls.DELETE, id=id)
+
+    def __repr__(self):
+        return f"RecordOperation({self.action!r}, record={self.record!r}, id={self.id!r})"
+
+
+class BatchResult:
+    """
+    The outcome of one RecordOperation. On success ok is True, id is the id of the record and record is the
+    record returned by the API (None for a delete). On failure ok is False and error describes why,
+    with the HTTP status_code if the API answered.
+    """
+
+    def __init__(self, operation, ok, id=None, record=None, status_code=None, error=None):
+        self.operation = operation
+        self.ok = ok
+        self.id = id
+        self.record = record
+        self.status_code = status_code
+        self.error = error
+
+    def __repr__(self):
+        return (f"BatchResult({self.operation!r}, ok={self.ok!r}, id={self.id!r}, "
+                f"status_code={self.status_code!r}, error={self.error!r})")
+
+
+def get_resource_record(id = 0, host='', ip='', type='A'):
+    # Define the data for updating a record, an "A" record unless another type is given. For other types ip is the answer.
     data = {
         "id": id, # Id is path parameter and not required in the request body
         # "domainName": is path parameter and not required in the request body
@@ -28,7 +168,7 @@ def get_resource_record(id = 0, host='', ip=''):
                                 # An apex record would be specified by either an empty host "" or "@". A SRV record would be specified by "_{service}._{protocal}.{host}":
                                 # e.g. "_sip._tcp.phone" for _sip._tcp.phone.example.org.
         # "fqdn": ,is read-only and not required in the request body
-        "type": "A",    # One of A, AAAA, CNAME, MX, NS, SRV, TXT, URL
+        "type": type,   # One of A, AAAA, CNAME, MX, NS, SRV, TXT, URL
         "answer": ip,   # answer is either the IP address for A or AAAA records; the target for ANAME, CNAME, MX, or NS records; the text for TXT records.
                         # For SRV records, answer has the following format: "{weight} {port} {target}" e.g. "1 5061 sip.example.org".
         "ttl": 300      # TTL is the time this record can be cached for in seconds. Name.com allows a minimum TTL of 300, or 5 minutes.
@@ -42,7 +182,7 @@ class NameCom:
     """
 
     @log_method_args
-    def __init__(self, api_username, api_token, domain, host):
+    def __init__(self, api_username, api_token, domain, host, connections=8):
         self.api_username = api_username
         self.api_token = api_token
         self.domain = domain
@@ -61,6 +201,18 @@ class NameCom:
             "Authorization": self.get_auth_header(),
             "Content-Type": "application/json"
         }
+
+        # Up to connections connections are kept open between requests and shared by every call, apply_batch included,
+        # and the API host name is resolved through a cache
+        self.connections = connections
+        self.session = create_session(connections=connections)
+
+        # Concurrent identical GET requests share one HTTP call
+        self._single_flight = SingleFlight()
+
+        # The last record listing, to skip downloading or parsing an unchanged zone
+        self._zone_lock = threading.Lock()
+        self._zone_cache = None
         logger.info('NameCom initialized')
 
     def set_api_base_url(self, api_username):
@@ -80,15 +232,44 @@ class NameCom:
         auth_header = base64.b64encode(auth_header).decode("utf-8")
         return "Basic " + auth_header
 
+    def prewarm(self):
+        """
+        Resolve the API host and open a connection to it ahead of the next requests.
+        """
+        prewarm(self.session, f"{self.API_BASE_URL}/hello", headers=self.headers)
+
+    def _get(self, api_url, headers=None):
+        """
+        GET api_url, sharing the response with any concurrent thread reading the same URL.
+        """
+        headers = headers or self.headers
+        return self._single_flight.do(api_url, lambda: self.session.get(api_url, headers=headers))
+
+    async def _get_async(self, api_url, headers=None):
+        """
+        GET api_url from asyncio, sharing the response with any concurrent task reading the same URL.
+        The blocking request is run in a worker thread.
+        """
+        headers = headers or self.headers
+        return await self._single_flight.do_async(
+            api_url, lambda: asyncio.to_thread(self.session.get, api_url, headers=headers))
+
     @log_method_args
     def create_record(self, ip):
+        data = get_resource_record(id=0, host=self.host, ip=ip)
+        return self.create_resource_record(data)
+
+    @log_method_args
+    def create_resource_record(self, data):
+        """
+        Create a record of any type from a resource record dict with host, type, answer, ttl and (for MX and SRV) priority.
+        Return the id of the new record, or None if the request failed.
+        """
         # Define the API endpoint
         api_url = f"{self.API_BASE_URL}/domains/{self.domain}/records"
 
-        data = get_resource_record(id=0, host=self.host, ip=ip)
-
         # Make the API request with authentication
-        response = requests.post(api_url, json=data, headers=self.headers)
+        response = self.session.post(api_url, json=data, headers=self.headers)
 
         if response.status_code == 200:
             data = response.json()
@@ -110,7 +291,7 @@ class NameCom:
         data = get_resource_record(id = 0, host=self.host, ip=ip)
 
         # Make the API request with authentication
-        response = requests.put(api_url, json=data, headers=self.headers)
+        response = self.session.put(api_url, json=data, headers=self.headers)
 
         if response.status_code == 200:
             data = response.json()
@@ -130,8 +311,16 @@ class NameCom:
         api_url = f"{self.API_BASE_URL}/domains/{self.domain}/records/{id}"
 
         # Make the API request with authentication
-        response = requests.get(api_url, headers=self.headers)
-    
+        response = self._get(api_url)
+        return self._parse_record_response(response)
+
+    @log_method_args
+    async def get_record_async(self, id):
+        api_url = f"{self.API_BASE_URL}/domains/{self.domain}/records/{id}"
+        response = await self._get_async(api_url)
+        return self._parse_record_response(response)
+
+    def _parse_record_response(self, response):
         if response.status_code == 200:
             data = response.json()
             # Process the API response data as needed
@@ -164,12 +353,71 @@ class NameCom:
         }
         """
        
+        records, modified = self.read_records()
+        return records
+
+    @log_method_args
+    def read_records(self):
+        """
+        Return a tuple (records, modified) for the domain, where modified is False if the zone is unchanged since the last read through this client.
+        An unchanged zone is neither parsed again nor, if the server supports conditional requests, downloaded again,
+        and the records of the last read are returned. They are shared between callers and must not be modified.
+        """
         # Define the API endpoint
         api_url = f"{self.API_BASE_URL}/domains/{self.domain}/records"
 
         # Make the API request with authentication
-        response = requests.get(api_url, headers=self.headers)
+        response = self._get(api_url, self._conditional_headers())
+        return self._read_records_response(response)
+
+    @log_method_args
+    async def list_records_async(self):
+        records, modified = await self.read_records_async()
+        return records
+
+    @log_method_args
+    async def read_records_async(self):
+        api_url = f"{self.API_BASE_URL}/domains/{self.domain}/records"
+        response = await self._get_async(api_url, self._conditional_headers())
+        return self._read_records_response(response)
+
+    def _conditional_headers(self):
+        """
+        Return the request headers, asking the server to only send the records if they changed since the last read.
+        """
+        with self._zone_lock:
+            cache = self._zone_cache
+        if cache is None or not (cache.etag or cache.last_modified):
+            return self.headers
+        headers = dict(self.headers)
+        if cache.etag:
+            headers["If-None-Match"] = cache.etag
+        if cache.last_modified:
+            headers["If-Modified-Since"] = cache.last_modified
+        return headers
+
+    def _read_records_response(self, response):
+        with self._zone_lock:
+            cache = self._zone_cache
+            if response.status_code == 304 and cache is not None:
+                logger.info(f"Records of {self.domain} not modified")
+                return cache.records, False
+            if response.status_code != 200:
+                return self._parse_records_response(response), True
 
+            digest = hashlib.sha256(response.content).digest()
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            if cache is not None and cache.digest == digest:
+                logger.info(f"Records of {self.domain} unchanged")
+                cache.etag, cache.last_modified = etag, last_modified
+                return cache.records, False
+
+            records = self._parse_records_response(response)
+            self._zone_cache = ZoneCache(records, digest, etag, last_modified)
+            return records, True
+
+    def _parse_records_response(self, response):
         if response.status_code == 200:
             data = response.json()
             # Process the API response data as needed
@@ -181,13 +429,30 @@ class NameCom:
             logger.info(response.text)
             return None
         
+    def iter_records(self, per_page=1000):
+        """
+        Yield all records for the domain one page at a time, so that a large zone is never held in memory at once.
+        """
+        page = 1
+        while page:
+            api_url = f"{self.API_BASE_URL}/domains/{self.domain}/records?perPage={per_page}&page={page}"
+            response = self._get(api_url)
+            if response.status_code != 200:
+                logger.info(f"Error: Request failed with status code {response.status_code}")
+                logger.info("Response Content:")
+                logger.info(response.text)
+                raise RuntimeError(f"Listing records of {self.domain} failed with status code {response.status_code}")
+            data = response.json()
+            yield from data.get("records", [])
+            page = data.get("nextPage")
+
     @log_method_args
     def delete_record(self, id):
         # Define the API endpoint
         api_url = f"{self.API_BASE_URL}/domains/{self.domain}/records/{id}"
 
         # Make the API request with authentication
-        response = requests.delete(api_url, headers=self.headers)
+        response = self.session.delete(api_url, headers=self.headers)
 
         if response.status_code == 204:
             return True
@@ -197,6 +462,77 @@ class NameCom:
             logger.info(response.text)
             return None
 
+    def apply_batch(self, operations, depth=None):
+        """
+        Apply an iterable of RecordOperation over the connections of the client's session, with at most depth
+        (by default twice the connections) operations in flight. Operations are read from the iterable as the
+        in-flight ones complete, so it may be a generator of any length.
+        Yield a BatchResult for every operation, in the order they complete.
+        """
+        # Not decorated with log_method_args, a batch may hold many thousands of records. Only counts are logged.
+        depth = depth or 2 * self.connections
+        applied = 0
+        failed = 0
+
+        def results(finished):
+            nonlocal applied, failed
+            for future in finished:
+                result = future.result()
+                applied += 1
+                failed += not result.ok
+                yield result
+
+        logger.info(f"Applying a batch to {self.domain} over {self.connections} connections with depth {depth}")
+        try:
+            with ThreadPoolExecutor(max_workers=self.connections) as executor:
+                in_flight = set()
+                for operation in operations:
+                    if len(in_flight) >= depth:
+                        finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        yield from results(finished)
+                    in_flight.add(executor.submit(self._apply_operation, operation))
+                while in_flight:
+                    finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    yield from results(finished)
+        finally:
+            logger.info(f"Applied {applied} operations to {self.domain}, {failed} failed")
+
+    def _apply_operation(self, operation):
+        """
+        Apply one operation. Any failure is returned as a BatchResult, so that it does not stop the rest of the batch.
+        """
+        try:
+            return self._send_operation(operation)
+        except Exception as e:
+            logger.info(f"Error: {operation.action} failed: {e!r}")
+            return BatchResult(operation, False, id=operation.id, error=f"{type(e).__name__}: {e}")
+
+    def _send_operation(self, operation):
+        api_url = f"{self.API_BASE_URL}/domains/{self.domain}/records"
+        if operation.action == RecordOperation.CREATE:
+            response = self.session.post(api_url, json=operation.record, headers=self.headers)
+        elif operation.action == RecordOperation.UPDATE:
+            response = self.session.put(f"{api_url}/{operation.id}", json=operation.record, headers=self.headers)
+        else:
+            response = self.session.delete(f"{api_url}/{operation.id}", headers=self.headers)
+
+        if operation.action == RecordOperation.DELETE and response.status_code == 204:
+            return BatchResult(operation, True, id=operation.id, status_code=response.status_code)
+        if operation.action != RecordOperation.DELETE and response.status_code == 200:
+            try:
+                data = response.json()
+            except ValueError as e:
+                return BatchResult(operation, False, id=operation.id, status_code=response.status_code,
+                                   error=f"Invalid JSON in response: {e}")
+            return BatchResult(operation, True, id=data.get("id"), record=data, status_code=response.status_code)
+
+        try:
+            error = response.json().get("message", response.text)
+        except (ValueError, AttributeError):
+            error = response.text
+        logger.info(f"Error: {operation.action} failed with status code {response.status_code}: {error}")
+        return BatchResult(operation, False, id=operation.id, status_code=response.status_code, error=error)
+
     @log_method_args
     def read_host_record(self):
         """
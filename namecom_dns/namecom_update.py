@@ -2,10 +2,14 @@
 # Description: Update DNS records with external IP address
 
 from namecom_dns.namecom import NameCom
+from namecom_dns.config import ConfigWatcher
+from namecom_dns.resolver import create_session, prewarm
+from namecom_dns import history
 import requests
 import argparse
 import time
 import os
+import re
 import sys
 import logging
 
@@ -14,9 +18,16 @@ logger = logging.getLogger(__name__)
 # Set log level
 logger.setLevel(logging.INFO)
 
-def get_external_ip():
-    IP_CHECK_URL = "https://ipinfo.io/ip"
-    response = requests.get(IP_CHECK_URL)
+IP_CHECK_URL = "https://ipinfo.io/ip"
+
+# Seconds between checks of the configuration file for changes
+CONFIG_POLL_INTERVAL = 5
+
+# Seconds before the next cycle that connections are pre-warmed, short enough for servers to keep them open
+PREWARM_LEAD = 2
+
+def get_external_ip(ip_url=IP_CHECK_URL, session=requests):
+    response = session.get(ip_url)
     if response.status_code == 200:
         return response.text.strip()
     else:
@@ -41,15 +52,160 @@ def create_logging_handler(logdir="./"):
     # Add the file handler to the logger
     logger.addHandler(file_handler)
 
+def parse_hostnames(value):
+    """
+    Return the list of host names in a comma or space separated value. No value is the apex record.
+    """
+    if not value:
+        return [""]
+    return [name for name in re.split(r"[\s,]+", value) if name]
+
+
+class Settings:
+    """
+    The settings that can be changed while the service is running.
+    """
+
+    def __init__(self, domain, hostnames, interval, ip_url):
+        self.domain = domain
+        self.hostnames = hostnames
+        self.interval = interval
+        self.ip_url = ip_url
+
+    @classmethod
+    def from_config(cls, config, defaults):
+        """
+        Return the settings of a configuration file, using defaults for those that are not set in it.
+        """
+        if "NAMECOM_HOSTNAME" in config:
+            hostnames = parse_hostnames(config["NAMECOM_HOSTNAME"])
+        else:
+            hostnames = defaults.hostnames
+        try:
+            interval = int(config["NAMECOM_INTERVAL"]) if "NAMECOM_INTERVAL" in config else defaults.interval
+        except ValueError:
+            logger.info(f"Error: NAMECOM_INTERVAL={config['NAMECOM_INTERVAL']} is not a number, keeping {defaults.interval}")
+            interval = defaults.interval
+        return cls(config.get("NAMECOM_DOMAIN", defaults.domain),
+                   hostnames,
+                   interval,
+                   config.get("NAMECOM_IPURL", defaults.ip_url))
+
+
+class Target:
+    """
+    The DNS A record of one host. The record id and answer are kept between cycles and configuration reloads.
+    Changes are recorded in the history store, if one is given.
+    """
+
+    def __init__(self, namecom, history_writer=None):
+        self.namecom = namecom
+        self.history_writer = history_writer
+        self.id = 0
+        self.ip = ""
+
+    def name(self):
+        if self.namecom.host and self.namecom.host != "@":
+            return f"{self.namecom.host}.{self.namecom.domain}"
+        return self.namecom.domain
+
+    def record_history(self, old_ip, new_ip, started, outcome):
+        if self.history_writer:
+            latency = (time.monotonic() - started) * 1000
+            try:
+                self.history_writer.append(self.name(), old_ip, new_ip, latency, outcome)
+            except (OSError, ValueError) as e:
+                # The history is only a record, updating DNS goes on without it
+                logger.info(f"Error: Could not record the change of {self.name()} in the history: {e}")
+
+    def start(self, current_ip):
+        # Check if there is a DNS A record already
+        record = self.namecom.read_host_record()
+        if record:
+            # There should be a record answer and an id
+            self.ip = record["answer"]
+            self.id = record["id"]
+            logger.info(f"Initial Read of ID: {self.id}  IP: {self.ip}")
+        else: # No DNS record for the host is found. Create one.
+            started = time.monotonic()
+            self.id = self.namecom.create_record(current_ip)
+            self.record_history("", current_ip, started, history.OUTCOME_FAILED if self.id is None else history.OUTCOME_CREATED)
+            self.ip = current_ip
+            logger.info(f"Created a new A record for FQDN: {self.namecom.host}.{self.namecom.domain} with IP: {current_ip} and ID: {self.id}")
+
+    def update(self, new_ip):
+        if new_ip and new_ip != self.ip:
+            logger.info(f"New IP address detected: {new_ip}")
+            started = time.monotonic()
+            if self.id != 0 and self.id != None:
+                logger.info(f"Update for ID: {self.id}  IP: {new_ip}")
+                result = self.namecom.update_record(self.id, new_ip)
+                outcome = history.OUTCOME_UPDATED
+            else:
+                logger.info(f"Create for  IP: {new_ip}")
+                self.id = self.namecom.create_record(new_ip)
+                result = self.id
+                outcome = history.OUTCOME_CREATED
+            self.record_history(self.ip, new_ip, started, history.OUTCOME_FAILED if result is None else outcome)
+            self.ip = new_ip
+
+
+def sync_targets(targets, settings, api_username, api_token, current_ip, history_writer=None):
+    """
+    Add and remove targets to match the settings. Targets that are kept are left untouched.
+    Removed targets keep their DNS record, it is only no longer updated.
+    """
+    wanted = [(settings.domain, hostname) for hostname in settings.hostnames]
+    for key in list(targets):
+        if key not in wanted:
+            logger.info(f"Stopped updating host: {key[1]} domain: {key[0]}")
+            del targets[key]
+    for key in wanted:
+        if key not in targets:
+            target = Target(NameCom(api_username, api_token, key[0], key[1]), history_writer)
+            target.start(current_ip)
+            targets[key] = target
+
+
+def wait_for_next_cycle(interval, watcher, prewarm_connections=None):
+    """
+    Sleep for interval seconds, or until the configuration file changes.
+    prewarm_connections is called PREWARM_LEAD seconds before the interval ends.
+    """
+    deadline = time.monotonic() + interval
+    while True:
+        if watcher and watcher.changed():
+            return
+        remaining = deadline - time.monotonic()
+        if prewarm_connections and remaining <= PREWARM_LEAD:
+            prewarm_connections()
+            prewarm_connections = None
+            remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        if prewarm_connections:
+            remaining -= PREWARM_LEAD
+        if watcher:
+            remaining = min(remaining, CONFIG_POLL_INTERVAL)
+        time.sleep(max(remaining, 0))
+
+
 def main():                         
+    if sys.argv[1:2] == ["history"]:
+        history.main(sys.argv[2:])
+
     # Define and parse command-line arguments
     parser = argparse.ArgumentParser(description="Update DNS records with external IP address")
-    parser.add_argument("-n", "--name", required=False, help="Host name")
-    parser.add_argument("-d", "--domain", required=True, help="Domain name")
+    parser.add_argument("-n", "--name", required=False, help="Host name, or a comma separated list of host names")
+    parser.add_argument("-d", "--domain", required=False, help="Domain name, required unless set in the configuration file")
     parser.add_argument("-i", "--interval", type=int, default=60, help="Polling interval in seconds")
     parser.add_argument("-t", "--test", type=bool, default=False, help="Test mode. Run loop interval number of times and exit.")
     parser.add_argument("-l", "--log", action="store_true", help="Log to namecom_dns.log")
     parser.add_argument("--logdir", type=str, default="./", help="Log to namecom_dns.log in the specified directory")
+    parser.add_argument("-c", "--config", type=str, default=None, help="Read settings from this namecom_dns.cfg file and reload them when it changes")
+    parser.add_argument("--ipurl", type=str, default=IP_CHECK_URL, help="URL returning the external IP address")
+    parser.add_argument("--prewarm", action="store_true", help="Resolve and connect to the IP and API servers shortly before each check")
+    parser.add_argument("--history", type=str, default=None, help="Record address changes in this history file, query it with 'namecom_dns history FILE'")
 
     
     args = parser.parse_args()
@@ -57,62 +213,87 @@ def main():
     if args.log:
         create_logging_handler(args.logdir)
 
+    # The command-line settings, used on every reload for the keys the configuration file does not set
+    defaults = Settings(args.domain, parse_hostnames(args.name), args.interval, args.ipurl)
+    settings = defaults
+    config = {}
+    watcher = None
+    if args.config:
+        watcher = ConfigWatcher(args.config)
+        config = watcher.poll()
+        if config is None:
+            logger.info(f"Error: Could not read configuration file {args.config}")
+            sys.exit(1)
+        settings = Settings.from_config(config, defaults)
+
+    if not settings.domain:
+        logger.info("Error: No domain given with --domain or NAMECOM_DOMAIN in the configuration file.")
+        sys.exit(1)
+
     # Name.com API credentials
     APIUSERNAME_VAR = "NAMECOM_APIUSERNAME"
     APITOKEN_VAR = "NAMECOM_APITOKEN"
 
     # Check and assign API_USERNAME
-    api_username = os.environ.get(APIUSERNAME_VAR)
+    api_username = config.get(APIUSERNAME_VAR) or os.environ.get(APIUSERNAME_VAR)
     if not api_username:
         logger.info(f"Error: Environment variable {APIUSERNAME_VAR} is not set.")
         sys.exit(1)
 
     # Check and assign API_TOKEN
-    api_token = os.environ.get(APITOKEN_VAR)
+    api_token = config.get(APITOKEN_VAR) or os.environ.get(APITOKEN_VAR)
     if not api_token:
         logger.info(f"Error: Environment variable {APITOKEN_VAR} is not set.")
         sys.exit(1)
 
     logger.info(f"Starting service")   
 
-    NameDotCom = NameCom(api_username, api_token, args.domain, args.name)
-    
-    # Set the id of DNS record for the host from start. It will be challenged below.
-    id = 0
+    # Connections to the IP server are kept open and its name is resolved through a cache
+    ip_session = create_session()
 
-    current_ip = get_external_ip()
+    current_ip = get_external_ip(settings.ip_url, ip_session)
     if current_ip:
         logger.info(f"Initial  external IP: {current_ip}")
     else:
         current_ip = "0.0.0.0"
         logger.info(f"No Initial IP! Continuing with IP: {current_ip}")   
-    
-    # Check if there is a DNS A record already
-    record = NameDotCom.read_host_record()
-    if record:
-        # There should be a record answer and an id
-        current_ip = record["answer"]
-        id = record["id"]
-        logger.info(f"Initial Read of ID: {id}  IP: {current_ip}")
-    else: # No DNS record for the host is found. Create one.
-        id = NameDotCom.create_record(current_ip)
-        logger.info(f"Created a new A record for FQDN: {args.name}.{args.domain} with IP: {current_ip} and ID: {id}")
 
+    history_writer = None
+    if args.history:
+        try:
+            history_writer = history.HistoryWriter(args.history)
+        except (OSError, ValueError) as e:
+            logger.info(f"Error: Could not open history file {args.history}, changes are not recorded: {e}")
+
+    # The DNS records to keep updated, by (domain, host name)
+    targets = {}
+    sync_targets(targets, settings, api_username, api_token, current_ip, history_writer)
+
+    def prewarm_connections():
+        prewarm(ip_session, settings.ip_url)
+        for target in targets.values():
+            target.namecom.prewarm()
+    if not args.prewarm:
+        prewarm_connections = None
 
     if args.test:
         number_of_loops = args.interval
     else:
         number_of_loops = 0
     while True:
-        new_ip = get_external_ip()
-        if new_ip and new_ip != current_ip:
-            logger.info(f"New IP address detected: {new_ip}")
-            if id != 0 and id != None:
-                logger.info(f"Update for ID: {id}  IP: {new_ip}")
-                NameDotCom.update_record(id, new_ip)
-            else:
-                logger.info(f"Create for  IP: {new_ip}")
-                id = NameDotCom.create_record(new_ip)
+        if watcher:
+            config = watcher.poll()
+            if config is not None:
+                if (config.get(APIUSERNAME_VAR, api_username), config.get(APITOKEN_VAR, api_token)) != (api_username, api_token):
+                    logger.info("API credentials changed, restart the service to use them")
+                settings = Settings.from_config(config, defaults)
+                logger.info(f"Configuration reloaded: domain: {settings.domain} hosts: {settings.hostnames} interval: {settings.interval} IP URL: {settings.ip_url}")
+                sync_targets(targets, settings, api_username, api_token, current_ip, history_writer)
+
+        new_ip = get_external_ip(settings.ip_url, ip_session)
+        if new_ip:
+            for target in targets.values():
+                target.update(new_ip)
             current_ip = new_ip
         
         if args.test and number_of_loops != 0:
@@ -122,8 +303,8 @@ def main():
             logger.info(f"Test mode. Run loop finished, exiting! loop={number_of_loops}")
             sys.exit(0)
         else:
-            # Don't spam the log logger.info(f"Sleeping for {args.interval} seconds")
-            time.sleep(args.interval)
+            # Don't spam the log logger.info(f"Sleeping for {settings.interval} seconds")
+            wait_for_next_cycle(settings.interval, watcher, prewarm_connections)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,148 @@
+# Description: Cached name resolution and pre-warmed connections for the API endpoints
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError, NewConnectionError
+from urllib3.util import connection
+import requests
+import socket
+import sys
+import threading
+import time
+import logging
+
+# Create a logger object
+logger = logging.getLogger(__name__)
+# Set log level
+logger.setLevel(logging.INFO)
+
+# Seconds a looked up address list is reused. The system resolver does not tell the TTL of an answer,
+# so this is an assumed lifetime and not the TTL of the endpoints.
+CACHE_LIFETIME = 300
+
+
+class DNSCache:
+    """
+    An in-process cache of host name lookups. Entries are looked up again when older than lifetime seconds.
+    If a lookup fails, the last known good addresses are used instead, however old they are.
+    """
+
+    def __init__(self, lifetime=CACHE_LIFETIME, getaddrinfo=socket.getaddrinfo):
+        self.lifetime = lifetime
+        self._getaddrinfo = getaddrinfo
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def resolve(self, host, port):
+        """
+        Return the list of IP addresses for host and port, in the order the resolver returned them.
+        """
+        key = (host, port)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and time.monotonic() - entry[0] < self.lifetime:
+            return entry[1]
+
+        try:
+            infos = self._getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        except OSError as e:
+            if entry:
+                logger.info(f"Lookup of {host} failed ({e}), using last known addresses {entry[1]}")
+                return entry[1]
+            raise
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        with self._lock:
+            self._entries[key] = (time.monotonic(), addresses)
+        return addresses
+
+
+# Shared by all sessions created with create_session, so that every NameCom client resolves each endpoint once per lifetime
+DEFAULT_DNS_CACHE = DNSCache()
+
+
+class CachedDNSConnectionMixin:
+    """
+    Connect to the addresses of the host from a DNSCache, trying each in turn.
+    Only the socket connect uses the addresses, the host name is left as is for the Host header, SNI and certificate checks.
+    """
+    dns_cache = DEFAULT_DNS_CACHE
+
+    def _new_conn(self):
+        try:
+            addresses = self.dns_cache.resolve(self._dns_host, self.port)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        if not addresses:
+            raise NameResolutionError(self.host, self, socket.gaierror(f"No addresses found for {self.host}"))
+
+        error = None
+        for address in addresses:
+            try:
+                sock = connection.create_connection(
+                    (address, self.port),
+                    self.timeout,
+                    source_address=self.source_address,
+                    socket_options=self.socket_options,
+                )
+            except socket.timeout as e:
+                error = ConnectTimeoutError(self, f"Connection to {self.host} timed out. (connect timeout={self.timeout})")
+            except OSError as e:
+                error = NewConnectionError(self, f"Failed to establish a new connection: {e}")
+            else:
+                sys.audit("http.client.connect", self, self.host, self.port)
+                return sock
+        raise error
+
+
+class CachedHTTPConnection(CachedDNSConnectionMixin, HTTPConnection):
+    pass
+
+
+class CachedHTTPSConnection(CachedDNSConnectionMixin, HTTPSConnection):
+    pass
+
+
+class CachedDNSAdapter(HTTPAdapter):
+    """
+    A requests transport adapter whose connections resolve host names through a DNSCache.
+    """
+
+    def __init__(self, dns_cache=DEFAULT_DNS_CACHE, **kwargs):
+        self.dns_cache = dns_cache
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        http_connection = type("CachedHTTPConnection", (CachedHTTPConnection,), {"dns_cache": self.dns_cache})
+        https_connection = type("CachedHTTPSConnection", (CachedHTTPSConnection,), {"dns_cache": self.dns_cache})
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": type("CachedHTTPConnectionPool", (HTTPConnectionPool,), {"ConnectionCls": http_connection}),
+            "https": type("CachedHTTPSConnectionPool", (HTTPSConnectionPool,), {"ConnectionCls": https_connection}),
+        }
+
+
+def create_session(dns_cache=DEFAULT_DNS_CACHE, connections=None):
+    """
+    Return a requests session that keeps connections open between requests and resolves host names through dns_cache.
+    If connections is given, at most that many connections are opened per host and further requests wait for a free one.
+    """
+    session = requests.Session()
+    if connections:
+        adapter = CachedDNSAdapter(dns_cache, pool_maxsize=connections, pool_block=True)
+    else:
+        adapter = CachedDNSAdapter(dns_cache)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def prewarm(session, url, headers=None):
+    """
+    Resolve the host of url and open a connection to it in session, so that the next request to the host pays
+    neither lookup nor handshake latency. A failure is logged and otherwise ignored, the request will simply connect itself.
+    """
+    try:
+        session.head(url, headers=headers, timeout=10)
+    except requests.RequestException as e:
+        logger.info(f"Pre-warming {url} failed: {e}")
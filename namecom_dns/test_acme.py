@@ -0,0 +1,126 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch, call
+from namecom_dns.acme import ChallengeBatch, find_zone, read_challenges
+from namecom_dns.namecom import get_resource_record
+
+
+class TestAcme(unittest.TestCase):
+    API_USERNAME = "your-username"
+    API_TOKEN = "your-token"
+    DOMAINS = ["example.com", "sub.example.com", "example.org"]
+
+    def test_find_zone(self):
+        """
+        Test that names are matched to the longest domain, including apex and wildcard names.
+        """
+        self.assertEqual(find_zone("www.example.com", TestAcme.DOMAINS), ("example.com", "www"))
+        self.assertEqual(find_zone("a.sub.example.com.", TestAcme.DOMAINS), ("sub.example.com", "a"))
+        self.assertEqual(find_zone("example.org", TestAcme.DOMAINS), ("example.org", ""))
+        self.assertEqual(find_zone("*.example.org", TestAcme.DOMAINS), ("example.org", ""))
+        with self.assertRaises(ValueError):
+            find_zone("example.net", TestAcme.DOMAINS)
+
+    @patch("namecom_dns.acme.time.sleep")
+    @patch("namecom_dns.acme.NameCom")
+    def test_publish_wait_cleanup(self, mock_namecom, mock_sleep):
+        """
+        Test that a batch creates one TXT record per name, confirms them with one listing per domain,
+        waits a single propagation delay and deletes all records again.
+        """
+        mock_namecom_instance = mock_namecom.return_value
+        ids = iter(range(1, 100))
+        mock_namecom_instance.create_resource_record.side_effect = lambda data: next(ids)
+        mock_namecom_instance.iter_records.side_effect = lambda: iter([{"id": 1}, {"id": 2}, {"id": 3}])
+        mock_namecom_instance.delete_record.return_value = True
+
+        batch = ChallengeBatch(TestAcme.API_USERNAME, TestAcme.API_TOKEN, TestAcme.DOMAINS, workers=4)
+        challenges = read_challenges(["www.example.com token1\n", "example.org token2\n", "\n", "*.example.org token3\n"])
+        failed = batch.publish(challenges)
+
+        # Assertions
+        self.assertEqual(failed, [])
+        mock_namecom.assert_has_calls([call(TestAcme.API_USERNAME, TestAcme.API_TOKEN, "example.com", "", connections=4),
+                                       call(TestAcme.API_USERNAME, TestAcme.API_TOKEN, "example.org", "", connections=4)], any_order=True)
+        self.assertCountEqual(mock_namecom_instance.create_resource_record.call_args_list, [
+            call(get_resource_record(id=0, host="_acme-challenge.www", ip="token1", type="TXT")),
+            call(get_resource_record(id=0, host="_acme-challenge", ip="token2", type="TXT")),
+            call(get_resource_record(id=0, host="_acme-challenge", ip="token3", type="TXT")),
+        ])
+
+        missing = batch.wait(propagation_delay=30)
+        self.assertEqual(missing, [])
+        self.assertEqual(mock_namecom_instance.iter_records.call_count, 2)
+        mock_sleep.assert_called_once_with(30)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            state_path = os.path.join(tmpdir, "acme.json")
+            batch.save(state_path)
+            cleanup_batch = ChallengeBatch(TestAcme.API_USERNAME, TestAcme.API_TOKEN, [])
+            cleanup_batch.load(state_path)
+
+        remaining = cleanup_batch.cleanup()
+        self.assertEqual(remaining, [])
+        self.assertCountEqual(mock_namecom_instance.delete_record.call_args_list, [call(1), call(2), call(3)])
+
+    @patch("namecom_dns.acme.time.sleep")
+    @patch("namecom_dns.acme.NameCom")
+    def test_wait_polls_until_confirmed(self, mock_namecom, mock_sleep):
+        """
+        Test that wait keeps listing the records until a record that is missing at first appears,
+        and only then waits out the propagation delay.
+        """
+        mock_namecom_instance = mock_namecom.return_value
+        mock_namecom_instance.create_resource_record.side_effect = [1, 2]
+        listings = iter([[{"id": 1}], [{"id": 1}], [{"id": 1}, {"id": 2}]])
+        mock_namecom_instance.iter_records.side_effect = lambda: iter(next(listings))
+
+        batch = ChallengeBatch(TestAcme.API_USERNAME, TestAcme.API_TOKEN, TestAcme.DOMAINS, workers=1)
+        batch.publish([("www.example.com", "token1"), ("ftp.example.com", "token2")])
+        missing = batch.wait(propagation_delay=30, confirm_timeout=60)
+
+        # Assertions
+        self.assertEqual(missing, [])
+        self.assertEqual(mock_namecom_instance.iter_records.call_count, 3)
+        self.assertEqual(mock_sleep.call_args_list, [call(5), call(5), call(30)])
+
+    @patch("namecom_dns.acme.time.sleep")
+    @patch("namecom_dns.acme.NameCom")
+    def test_wait_gives_up_at_deadline(self, mock_namecom, mock_sleep):
+        """
+        Test that a record that never appears is returned as missing once the confirm timeout has passed.
+        """
+        mock_namecom_instance = mock_namecom.return_value
+        mock_namecom_instance.create_resource_record.return_value = 1
+        mock_namecom_instance.iter_records.side_effect = lambda: iter([])
+
+        batch = ChallengeBatch(TestAcme.API_USERNAME, TestAcme.API_TOKEN, TestAcme.DOMAINS)
+        batch.publish([("www.example.com", "token1")])
+        # The clock only advances while sleeping
+        clock = [0]
+        mock_sleep.side_effect = lambda seconds: clock.__setitem__(0, clock[0] + seconds)
+        with patch("namecom_dns.acme.time.monotonic", side_effect=lambda: clock[0]):
+            missing = batch.wait(propagation_delay=30, confirm_timeout=10)
+
+        # Assertions
+        self.assertEqual([record["name"] for record in missing], ["www.example.com"])
+        self.assertEqual(mock_sleep.call_args_list, [call(5), call(5), call(30)])
+
+    @patch("namecom_dns.acme.NameCom")
+    def test_publish_reports_failures(self, mock_namecom):
+        """
+        Test that names whose record could not be created are returned and not kept for the cleanup.
+        """
+        mock_namecom.return_value.create_resource_record.side_effect = lambda data: None if data["answer"] == "bad" else 7
+
+        batch = ChallengeBatch(TestAcme.API_USERNAME, TestAcme.API_TOKEN, TestAcme.DOMAINS)
+        failed = batch.publish([("www.example.com", "good"), ("ftp.example.com", "bad")])
+
+        # Assertions
+        self.assertEqual(failed, ["ftp.example.com"])
+        self.assertEqual([record["name"] for record in batch.records], ["www.example.com"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+from namecom_dns.config import read_config, ConfigWatcher
+
+
+class TestConfig(unittest.TestCase):
+
+    def write(self, path, text):
+        with open(path, "w") as cfg:
+            cfg.write(text)
+
+    def test_read_config(self):
+        """
+        Test that the settings are read the way bash would source them: comments removed and values unquoted.
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "namecom_dns.cfg")
+            self.write(path, '# A comment\n'
+                             '\n'
+                             'NAMECOM_REPO="location of namecom_dns repo"\n'
+                             'NAMECOM_HOSTNAME=www # Set @ for the root domain\n'
+                             'export NAMECOM_INTERVAL=300\n'
+                             "NAMECOM_IPURL='http://ipv4.icanhazip.com'\n"
+                             '# Not supported yet NAMECOM_OTHER=1\n')
+
+            config = read_config(path)
+
+        # Assertions
+        self.assertEqual(config, {
+            "NAMECOM_REPO": "location of namecom_dns repo",
+            "NAMECOM_HOSTNAME": "www",
+            "NAMECOM_INTERVAL": "300",
+            "NAMECOM_IPURL": "http://ipv4.icanhazip.com",
+        })
+
+    def test_config_watcher(self):
+        """
+        Test that the watcher returns the configuration on the first poll and after a change, and None otherwise.
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "namecom_dns.cfg")
+            self.write(path, "NAMECOM_HOSTNAME=www\n")
+            watcher = ConfigWatcher(path)
+
+            self.assertEqual(watcher.poll(), {"NAMECOM_HOSTNAME": "www"})
+            self.assertFalse(watcher.changed())
+            self.assertIsNone(watcher.poll())
+
+            self.write(path, "NAMECOM_HOSTNAME=www,vpn\n")
+            self.assertTrue(watcher.changed())
+            self.assertEqual(watcher.poll(), {"NAMECOM_HOSTNAME": "www,vpn"})
+
+            # A missing file keeps the previous configuration
+            os.remove(path)
+            self.assertIsNone(watcher.poll())
+
+
+if __name__ == "__main__":
+    unittest.main()
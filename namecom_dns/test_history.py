@@ -0,0 +1,155 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import MagicMock
+from namecom_dns import history
+from namecom_dns.history import HistoryWriter, HistoryReader, HistoryEntry
+from namecom_dns.namecom_update import Target
+
+
+class TestHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, "namecom.history")
+
+    def write_entries(self):
+        writer = HistoryWriter(self.path)
+        writer.append("www.example.com", "", "1.2.3.4", 120.0, history.OUTCOME_CREATED, timestamp=1000)
+        writer.append("vpn.example.com", "1.2.3.4", "1.2.3.5", 80.0, history.OUTCOME_UPDATED, timestamp=2000)
+        writer.append("www.example.com", "1.2.3.4", "2001:db8::1", 95.5, history.OUTCOME_UPDATED, timestamp=3000)
+        writer.append("www.example.com", "2001:db8::1", "1.2.3.6", 30000.0, history.OUTCOME_FAILED, timestamp=4000)
+        writer.close()
+
+    def test_range_and_point_in_time(self):
+        """
+        Test range queries, with and without a target, and the address of a target at a point in time.
+        """
+        self.write_entries()
+
+        with HistoryReader(self.path) as reader:
+            self.assertEqual(len(reader), 4)
+            self.assertEqual([entry.timestamp for entry in reader.range(2000, 3000)], [2000, 3000])
+            self.assertEqual([entry.timestamp for entry in reader.range(target="www.example.com")], [1000, 3000, 4000])
+            self.assertEqual(reader.at(3500, "www.example.com"),
+                             HistoryEntry(3000, "www.example.com", "1.2.3.4", "2001:db8::1", 95.5, history.OUTCOME_UPDATED))
+            self.assertEqual(reader.at(2999, "www.example.com").new_ip, "1.2.3.4")
+            self.assertEqual(reader.at(2000).target, "vpn.example.com")
+            self.assertIsNone(reader.at(999))
+
+    def test_append_keeps_time_order(self):
+        """
+        Test that entries are appended to an existing file, that a stepped back clock does not unsort it,
+        and that a partly written entry is dropped.
+        """
+        self.write_entries()
+        with open(self.path, "ab") as history_file:
+            history_file.write(b"\x01\x02\x03") # A crash in the middle of writing an entry
+
+        writer = HistoryWriter(self.path)
+        writer.append("www.example.com", "1.2.3.6", "1.2.3.7", 50.0, history.OUTCOME_UPDATED, timestamp=3500)
+        writer.close()
+
+        with HistoryReader(self.path) as reader:
+            self.assertEqual(len(reader), 5)
+            self.assertEqual(reader.entry(4).timestamp, 4000)
+            self.assertEqual(reader.entry(4).new_ip, "1.2.3.7")
+
+    def test_partial_header_is_rewritten(self):
+        """
+        Test that a file shorter than the header, left by a crash while it was created, is started again.
+        """
+        with open(self.path, "wb") as history_file:
+            history_file.write(history.MAGIC[:5])
+
+        writer = HistoryWriter(self.path)
+        writer.append("www.example.com", "", "1.2.3.4", 120.0, history.OUTCOME_CREATED, timestamp=1000)
+        writer.close()
+
+        with HistoryReader(self.path) as reader:
+            self.assertEqual(len(reader), 1)
+            self.assertEqual(reader.entry(0).new_ip, "1.2.3.4")
+
+    def test_long_target(self):
+        """
+        Test that a target of the maximum DNS name length is recorded and found.
+        """
+        target = ".".join(["a" * 63] * 3) + "." + "b" * 61
+        self.assertEqual(len(target), 253)
+
+        writer = HistoryWriter(self.path)
+        writer.append(target, "", "1.2.3.4", 120.0, history.OUTCOME_CREATED, timestamp=1000)
+        writer.close()
+
+        with HistoryReader(self.path) as reader:
+            self.assertEqual(reader.at(1000, target).target, target)
+
+    def test_history_command(self):
+        """
+        Test the point in time query of the history subcommand.
+        """
+        self.write_entries()
+
+        out = io.StringIO()
+        with redirect_stdout(out), self.assertRaises(SystemExit) as exit:
+            history.main([self.path, "--at", "1970-01-01T00:50:00+00:00", "--target", "www.example.com"])
+
+        # Assertions
+        self.assertEqual(exit.exception.code, 0)
+        self.assertIn("www.example.com 1.2.3.4 -> 2001:db8::1 updated 96 ms", out.getvalue())
+
+    def test_target_records_changes(self):
+        """
+        Test that the updater records created, updated and failed changes of a target.
+        """
+        namecom = MagicMock()
+        namecom.host = "www"
+        namecom.domain = "example.com"
+        namecom.read_host_record.return_value = None
+        namecom.create_record.return_value = 12345
+        namecom.update_record.side_effect = [12345, None]
+
+        writer = HistoryWriter(self.path)
+        target = Target(namecom, writer)
+        target.start("1.2.3.4")
+        target.update("1.2.3.4")
+        target.update("1.2.3.5")
+        target.update("1.2.3.6")
+        writer.close()
+
+        with HistoryReader(self.path) as reader:
+            entries = list(reader.range())
+        self.assertEqual([(entry.target, entry.old_ip, entry.new_ip, entry.outcome) for entry in entries], [
+            ("www.example.com", "", "1.2.3.4", history.OUTCOME_CREATED),
+            ("www.example.com", "1.2.3.4", "1.2.3.5", history.OUTCOME_UPDATED),
+            ("www.example.com", "1.2.3.5", "1.2.3.6", history.OUTCOME_FAILED),
+        ])
+
+    def test_failed_history_write_does_not_stop_updates(self):
+        """
+        Test that an error writing the history is logged and the record is still updated.
+        """
+        namecom = MagicMock()
+        namecom.host = "www"
+        namecom.domain = "example.com"
+        namecom.read_host_record.return_value = {"id": 12345, "answer": "1.2.3.4"}
+        namecom.update_record.return_value = 12345
+        writer = MagicMock()
+        writer.append.side_effect = OSError(28, "No space left on device")
+
+        target = Target(namecom, writer)
+        target.start("1.2.3.4")
+        with self.assertLogs("namecom_dns.namecom_update", level="INFO") as logs:
+            target.update("1.2.3.5")
+
+        # Assertions
+        namecom.update_record.assert_called_once_with(12345, "1.2.3.5")
+        self.assertEqual(target.ip, "1.2.3.5")
+        self.assertTrue(any("No space left on device" in line for line in logs.output))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,6 +2,7 @@ import unittest
 from unittest.mock import patch, MagicMock, call
 from namecom_dns.namecom import get_resource_record
 import os
+import tempfile
 import namecom_update
 
 # Mock environment variables
@@ -46,6 +47,8 @@ class TestMainLogic(unittest.TestCase):
         args.test = True
         args.log = True
         args.logdir = os.getcwd()
+        args.config = None
+        args.history = None
         mock_parse_args.return_value = args
 
         # Mock NameCom class and its methods
@@ -94,6 +97,8 @@ class TestMainLogic(unittest.TestCase):
         args.test = True
         args.log = True
         args.logdir = os.getcwd()
+        args.config = None
+        args.history = None
         mock_parse_args.return_value = args
 
         # Mock NameCom class and its methods
@@ -141,6 +146,8 @@ class TestMainLogic(unittest.TestCase):
         args.test = True
         args.log = True
         args.logdir = os.getcwd()
+        args.config = None
+        args.history = None
         mock_parse_args.return_value = args
 
         # Mock NameCom class and its methods
@@ -169,6 +176,113 @@ class TestMainLogic(unittest.TestCase):
         update_calls = [call(12345, '1.2.3.4'), call(12345, '1.2.3.5')]
         mock_namecom_instance.update_record.assert_has_calls(update_calls)
 
+    @patch('namecom_update.get_external_ip')
+    @patch('os.environ.get')
+    @patch('argparse.ArgumentParser.parse_args')
+    @patch('namecom_update.NameCom')
+    def test_main_logic_config_reload(self, mock_namecom, mock_parse_args, mock_get, mock_get_external_ip):
+        """
+         Verify that a change of the configuration file is applied without a restart: an added host name gets a record,
+         a removed one is no longer updated and the IP URL changes, while the state of the kept host is preserved.
+        """
+        mock_get.side_effect = self.mock_get
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            config_path = os.path.join(tmpdir, 'namecom_dns.cfg')
+            with open(config_path, 'w') as cfg:
+                cfg.write('NAMECOM_DOMAIN=example.com\nNAMECOM_HOSTNAME="host1 host2"\n')
+
+            def get_external_ip(ip_url, session):
+                if mock_get_external_ip.call_count == 2:
+                    # Change the configuration after the first loop
+                    with open(config_path, 'w') as cfg:
+                        cfg.write('NAMECOM_DOMAIN=example.com\nNAMECOM_HOSTNAME=host1,host3\nNAMECOM_IPURL=http://ip.example.org\n')
+                    return '1.2.3.4'
+                return '1.2.3.5' if mock_get_external_ip.call_count == 4 else '1.2.3.4'
+            mock_get_external_ip.side_effect = get_external_ip
+
+            # Mock command-line arguments
+            args = MagicMock()
+            args.name = None
+            args.domain = None
+            args.interval = 2
+            args.test = True
+            args.log = False
+            args.config = config_path
+            args.history = None
+            args.ipurl = 'https://ipinfo.io/ip'
+            mock_parse_args.return_value = args
+
+            # Mock NameCom class and its methods
+            mock_namecom_instance = mock_namecom.return_value
+            mock_namecom_instance.read_host_record.return_value = get_resource_record(id = 12345, host='host', ip='1.2.3.4')
+            mock_namecom_instance.update_record.return_value = 12345
+
+            try:
+                namecom_update.main()
+            except SystemExit as e:
+                self.assertEqual(e.code, 0)  # assert that the exit code is 0
+
+        # Assertions
+        mock_namecom.assert_has_calls([call('api_username', 'api_token', 'example.com', 'host1'),
+                                       call('api_username', 'api_token', 'example.com', 'host2'),
+                                       call('api_username', 'api_token', 'example.com', 'host3')], any_order=True)
+        self.assertEqual(mock_namecom.call_count, 3)
+        self.assertEqual(mock_namecom_instance.read_host_record.call_count, 3)
+        # Only host1 and host3 are updated to the new address
+        mock_namecom_instance.update_record.assert_has_calls([call(12345, '1.2.3.5'), call(12345, '1.2.3.5')])
+        self.assertEqual(mock_namecom_instance.update_record.call_count, 2)
+        self.assertEqual([c[0][0] for c in mock_get_external_ip.call_args_list],
+                         ['https://ipinfo.io/ip', 'https://ipinfo.io/ip', 'http://ip.example.org', 'http://ip.example.org'])
+
+    @patch('namecom_update.get_external_ip')
+    @patch('os.environ.get')
+    @patch('argparse.ArgumentParser.parse_args')
+    @patch('namecom_update.NameCom')
+    def test_main_logic_config_reload_removed_setting(self, mock_namecom, mock_parse_args, mock_get, mock_get_external_ip):
+        """
+         Verify that a setting removed from the configuration file falls back to the command-line value on reload.
+        """
+        mock_get.side_effect = self.mock_get
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            config_path = os.path.join(tmpdir, 'namecom_dns.cfg')
+            with open(config_path, 'w') as cfg:
+                cfg.write('NAMECOM_DOMAIN=example.com\nNAMECOM_HOSTNAME=host1\nNAMECOM_IPURL=http://ip.example.org\n')
+
+            def get_external_ip(ip_url, session):
+                if mock_get_external_ip.call_count == 2:
+                    # Remove NAMECOM_IPURL after the first loop
+                    with open(config_path, 'w') as cfg:
+                        cfg.write('NAMECOM_DOMAIN=example.com\nNAMECOM_HOSTNAME=host1\n')
+                return '1.2.3.4'
+            mock_get_external_ip.side_effect = get_external_ip
+
+            # Mock command-line arguments
+            args = MagicMock()
+            args.name = None
+            args.domain = None
+            args.interval = 2
+            args.test = True
+            args.log = False
+            args.config = config_path
+            args.history = None
+            args.ipurl = 'https://ipinfo.io/ip'
+            mock_parse_args.return_value = args
+
+            # Mock NameCom class and its methods
+            mock_namecom_instance = mock_namecom.return_value
+            mock_namecom_instance.read_host_record.return_value = get_resource_record(id = 12345, host='host', ip='1.2.3.4')
+
+            try:
+                namecom_update.main()
+            except SystemExit as e:
+                self.assertEqual(e.code, 0)  # assert that the exit code is 0
+
+        # Assertions
+        self.assertEqual([c[0][0] for c in mock_get_external_ip.call_args_list],
+                         ['http://ip.example.org', 'http://ip.example.org', 'https://ipinfo.io/ip', 'https://ipinfo.io/ip'])
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
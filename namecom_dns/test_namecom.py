@@ -1,6 +1,11 @@
+import asyncio
+import json
+import threading
+import time
 import unittest
 from unittest.mock import Mock, patch
-from namecom_dns.namecom import NameCom, get_resource_record
+import requests
+from namecom_dns.namecom import NameCom, SingleFlight, RecordOperation, get_resource_record
 from namecom_dns.namecom_update import get_external_ip
 
 
@@ -13,7 +18,7 @@ class TestNameCom(unittest.TestCase):
     HOST_NAME1 = "host"
 
 
-    @patch("namecom_dns.namecom.requests.get")
+    @patch("namecom_dns.namecom.requests.Session.get")
     def test_list_records(self, mock_get):
         """
         Test case for the ListRecords method using the Name.com API.
@@ -62,6 +67,8 @@ class TestNameCom(unittest.TestCase):
         ]
         }
         mock_response.json.return_value = resource_records
+        mock_response.content = json.dumps(resource_records).encode()
+        mock_response.headers = {}
         mock_response.status_code = 200
         mock_get.return_value = mock_response
 
@@ -82,7 +89,7 @@ class TestNameCom(unittest.TestCase):
             headers=namecom_instance.headers
         )
 
-    @patch("namecom_dns.namecom.requests.get")
+    @patch("namecom_dns.namecom.requests.Session.get")
     def test_get_record(self, mock_get):
         """
         Test case for GetRecord, retrieving a DNS record using the Name.com API.
@@ -126,7 +133,7 @@ class TestNameCom(unittest.TestCase):
         headers=namecom_instance.headers
         )
 
-    @patch("namecom_dns.namecom.requests.post")
+    @patch("namecom_dns.namecom.requests.Session.post")
     def test_create_record(self, mock_post):
         """
         Test case for CreateRecord, creating a DNS record using the Name.com API.
@@ -171,7 +178,7 @@ class TestNameCom(unittest.TestCase):
         headers=namecom_instance.headers
         )
 
-    @patch("namecom_dns.namecom.requests.put")
+    @patch("namecom_dns.namecom.requests.Session.put")
     def test_update_record(self, mock_put):
         """
         Test case for the UpdateRecord method using the Name.com API.
@@ -217,7 +224,7 @@ class TestNameCom(unittest.TestCase):
             headers=namecom_instance.headers
         )
 
-    @patch("namecom_dns.namecom.requests.delete")
+    @patch("namecom_dns.namecom.requests.Session.delete")
     def test_delete_record(self, mock_delete):
         """
         Test case for the DeleteRecord method using the Name.com API.
@@ -247,6 +254,330 @@ class TestNameCom(unittest.TestCase):
             headers=namecom_instance.headers
         )
         
+    @patch("namecom_dns.namecom.requests.Session.get")
+    def test_list_records_concurrent_threads_share_one_request(self, mock_get):
+        """
+        Test that concurrent list_records calls from several threads are coalesced into a single GET request,
+        and that every thread receives the records of the shared response.
+        """
+        mock_response = Mock()
+        mock_response.json.return_value = {"records": [get_resource_record(id=TestNameCom.RECORD_ID, host=TestNameCom.HOST_NAME1, ip=TestNameCom.EXTERNAL_IP)]}
+        mock_response.content = json.dumps(mock_response.json.return_value).encode()
+        mock_response.headers = {}
+        mock_response.status_code = 200
+        release = threading.Event()
+
+        def slow_get(*args, **kwargs):
+            release.wait(5)
+            return mock_response
+        mock_get.side_effect = slow_get
+
+        namecom_instance = NameCom(TestNameCom.API_USERNAME, TestNameCom.API_TOKEN, TestNameCom.DOMAIN, TestNameCom.HOST_NAME1)
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(namecom_instance.list_records())) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1) # Let all threads join the in-flight call
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        # Assertions
+        mock_get.assert_called_once_with(
+            f"https://api.name.com/v4/domains/{TestNameCom.DOMAIN}/records",
+            headers=namecom_instance.headers
+        )
+        self.assertEqual(len(results), 5)
+        for records in results:
+            self.assertEqual(records[0]["id"], TestNameCom.RECORD_ID)
+
+        # The result is not cached, a later call makes a new request
+        namecom_instance.list_records()
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch("namecom_dns.namecom.requests.Session.get")
+    def test_get_record_concurrent_tasks_share_one_request(self, mock_get):
+        """
+        Test that concurrent get_record_async calls from several asyncio tasks are coalesced into a single GET request.
+        """
+        resource_record = get_resource_record(id=TestNameCom.RECORD_ID, host=TestNameCom.HOST_NAME1, ip=TestNameCom.EXTERNAL_IP)
+        mock_response = Mock()
+        mock_response.json.return_value = resource_record
+        mock_response.status_code = 200
+
+        def slow_get(*args, **kwargs):
+            time.sleep(0.1)
+            return mock_response
+        mock_get.side_effect = slow_get
+
+        namecom_instance = NameCom(TestNameCom.API_USERNAME, TestNameCom.API_TOKEN, TestNameCom.DOMAIN, TestNameCom.HOST_NAME1)
+
+        async def read_all():
+            return await asyncio.gather(*[namecom_instance.get_record_async(TestNameCom.RECORD_ID) for _ in range(5)])
+
+        results = asyncio.run(read_all())
+
+        # Assertions
+        self.assertEqual(results, [resource_record] * 5)
+        mock_get.assert_called_once_with(
+            f"https://api.name.com/v4/domains/{TestNameCom.DOMAIN}/records/{TestNameCom.RECORD_ID}",
+            headers=namecom_instance.headers
+        )
+
+    def make_records_response(self, records, status_code=200, headers={}):
+        mock_response = Mock()
+        mock_response.status_code = status_code
+        mock_response.headers = headers
+        mock_response.json.return_value = {"records": records}
+        mock_response.content = json.dumps({"records": records}).encode() if status_code == 200 else b""
+        return mock_response
+
+    @patch("namecom_dns.namecom.requests.Session.get")
+    def test_read_records_conditional_request(self, mock_get):
+        """
+        Test that the ETag and Last-Modified of a listing are sent with the next one, and that a 304 Not Modified
+        response returns the records of the last read, flagged as not modified.
+        """
+        records = [get_resource_record(id=TestNameCom.RECORD_ID, host=TestNameCom.HOST_NAME1, ip=TestNameCom.EXTERNAL_IP)]
+        mock_get.side_effect = [
+            self.make_records_response(records, headers={"ETag": '"v1"', "Last-Modified": "Wed, 01 May 2024 03:12:00 GMT"}),
+            self.make_records_response([], status_code=304),
+        ]
+
+        namecom_instance = NameCom(TestNameCom.API_USERNAME, TestNameCom.API_TOKEN, TestNameCom.DOMAIN, TestNameCom.HOST_NAME1)
+
+        # Assertions
+        self.assertEqual(namecom_instance.read_records(), (records, True))
+        self.assertEqual(namecom_instance.read_records(), (records, False))
+        headers = mock_get.call_args_list[1][1]["headers"]
+        self.assertEqual(headers["If-None-Match"], '"v1"')
+        self.assertEqual(headers["If-Modified-Since"], "Wed, 01 May 2024 03:12:00 GMT")
+        self.assertEqual(headers["Authorization"], namecom_instance.headers["Authorization"])
+
+    @patch("namecom_dns.namecom.requests.Session.get")
+    def test_read_records_unchanged_body(self, mock_get):
+        """
+        Test that without conditional request support an unchanged listing is detected from its body and not parsed again,
+        while a changed listing is.
+        """
+        records = [get_resource_record(id=TestNameCom.RECORD_ID, host=TestNameCom.HOST_NAME1, ip=TestNameCom.EXTERNAL_IP)]
+        changed = [get_resource_record(id=TestNameCom.RECORD_ID, host=TestNameCom.HOST_NAME1, ip="10.0.0.2")]
+        responses = [self.make_records_response(records), self.make_records_response(records), self.make_records_response(changed)]
+        mock_get.side_effect = responses
+
+        namecom_instance = NameCom(TestNameCom.API_USERNAME, TestNameCom.API_TOKEN, TestNameCom.DOMAIN, TestNameCom.HOST_NAME1)
+
+        # Assertions
+        self.assertEqual(namecom_instance.read_records(), (records, True))
+        self.assertEqual(namecom_instance.read_records(), (records, False))
+        responses[1].json.assert_not_called()
+        self.assertEqual(namecom_instance.list_records(), changed)
+        # No validators were received, so no conditional headers are sent
+        for request in mock_get.call_args_list:
+            self.assertIs(request[1]["headers"], namecom_instance.headers)
+
+    @patch("namecom_dns.namecom.requests.Session.delete")
+    @patch("namecom_dns.namecom.requests.Session.put")
+    @patch("namecom_dns.namecom.requests.Session.post")
+    def test_apply_batch(self, mock_post, mock_put, mock_delete):
+        """
+        Test that apply_batch sends mixed operations of any record type and yields a structured result for each,
+        including API errors and connection failures.
+        """
+        def post(api_url, json, headers):
+            mock_response = Mock()
+            if json["type"] == "BAD":
+                mock_response.status_code = 400
+                mock_response.json.return_value = {"message": "Invalid Argument"}
+            else:
+                mock_response.status_code = 200
+                mock_response.json.return_value = dict(json, id=json["answer"].count(".") + 100)
+            return mock_response
+        mock_post.side_effect = post
+        mock_put.side_effect = requests.ConnectionError("connection reset")
+        mock_delete.return_value = Mock(status_code=204)
+
+        namecom_instance = NameCom(TestNameCom.API_USERNAME, TestNameCom.API_TOKEN, TestNameCom.DOMAIN, TestNameCom.HOST_NAME1, connections=2)
+        txt = get_resource_record(host="txt", ip="hello", type="TXT")
+        bad = get_resource_record(host="bad", ip="x", type="BAD")
+        operations = [
+            RecordOperation.create(txt),
+            RecordOperation.create(bad),
+            RecordOperation.update(TestNameCom.RECORD_ID, get_resource_record(host=TestNameCom.HOST_NAME1, ip=TestNameCom.EXTERNAL_IP)),
+            RecordOperation.delete(5678),
+        ]
+
+        results = {result.operation.action + str(result.operation.record and result.operation.record["type"]): result
+                   for result in namecom_instance.apply_batch(operations)}
+
+        # Assertions
+        self.assertEqual(len(results), 4)
+        self.assertTrue(results["createTXT"].ok)
+        self.assertEqual(results["createTXT"].id, 100)
+        self.assertFalse(results["createBAD"].ok)
+        self.assertEqual((results["createBAD"].status_code, results["createBAD"].error), (400, "Invalid Argument"))
+        self.assertFalse(results["updateA"].ok)
+        self.assertEqual(results["updateA"].id, TestNameCom.RECORD_ID)
+        self.assertIn("connection reset", results["updateA"].error)
+        self.assertTrue(results["deleteNone"].ok)
+        self.assertEqual(results["deleteNone"].id, 5678)
+        mock_post.assert_any_call(f"https://api.name.com/v4/domains/{TestNameCom.DOMAIN}/records",
+                                  json=txt, headers=namecom_instance.headers)
+        mock_delete.assert_called_once_with(f"https://api.name.com/v4/domains/{TestNameCom.DOMAIN}/records/5678",
+                                            headers=namecom_instance.headers)
+
+    @patch("namecom_dns.namecom.requests.Session.delete")
+    def test_apply_batch_bounded_depth(self, mock_delete):
+        """
+        Test that apply_batch reads no more operations than the in-flight depth allows before results are taken.
+        """
+        release = threading.Event()
+
+        def delete(*args, **kwargs):
+            release.wait(5)
+            return Mock(status_code=204)
+        mock_delete.side_effect = delete
+
+        consumed = []
+        def operations():
+            for id in range(1, 11):
+                consumed.append(id)
+                yield RecordOperation.delete(id)
+
+        namecom_instance = NameCom(TestNameCom.API_USERNAME, TestNameCom.API_TOKEN, TestNameCom.DOMAIN, TestNameCom.HOST_NAME1, connections=2)
+        results = namecom_instance.apply_batch(operations(), depth=3)
+
+        threading.Timer(0.2, release.set).start()
+        first = next(results)
+
+        # Assertions
+        self.assertTrue(first.ok)
+        self.assertEqual(consumed, [1, 2, 3, 4])
+        self.assertEqual(sorted([first.id] + [result.id for result in results]), list(range(1, 11)))
+
+    @patch("namecom_dns.namecom.requests.Session.post")
+    def test_apply_batch_invalid_response(self, mock_post):
+        """
+        Test that a response that cannot be decoded, or any other error in one operation, is returned as
+        a failed result and the rest of the batch is still applied.
+        """
+        def post(api_url, json, headers):
+            if json["host"] == "crash":
+                raise RuntimeError("unexpected")
+            mock_response = Mock(status_code=200)
+            if json["host"] == "garbled":
+                mock_response.json.side_effect = ValueError("bad json")
+            else:
+                mock_response.json.return_value = dict(json, id=1)
+            return mock_response
+        mock_post.side_effect = post
+
+        namecom_instance = NameCom(TestNameCom.API_USERNAME, TestNameCom.API_TOKEN, TestNameCom.DOMAIN, TestNameCom.HOST_NAME1)
+        operations = [RecordOperation.create(get_resource_record(host=host, ip=TestNameCom.EXTERNAL_IP))
+                      for host in ("garbled", "crash", "good")]
+
+        results = {result.operation.record["host"]: result for result in namecom_instance.apply_batch(operations)}
+
+        # Assertions
+        self.assertEqual(len(results), 3)
+        self.assertFalse(results["garbled"].ok)
+        self.assertEqual(results["garbled"].status_code, 200)
+        self.assertIn("bad json", results["garbled"].error)
+        self.assertFalse(results["crash"].ok)
+        self.assertEqual(results["crash"].error, "RuntimeError: unexpected")
+        self.assertTrue(results["good"].ok)
+
+    def test_apply_batch_uses_client_session(self):
+        """
+        Test that batches are sent over the client's long-lived session, whose pool is limited to its connections.
+        """
+        namecom_instance = NameCom(TestNameCom.API_USERNAME, TestNameCom.API_TOKEN, TestNameCom.DOMAIN, TestNameCom.HOST_NAME1, connections=3)
+        adapter = namecom_instance.session.get_adapter(namecom_instance.API_BASE_URL)
+
+        with patch.object(namecom_instance.session, "delete", return_value=Mock(status_code=204)) as mock_delete, \
+                self.assertLogs("namecom_dns.namecom", level="INFO") as logs:
+            results = list(namecom_instance.apply_batch([RecordOperation.delete(1), RecordOperation.delete(2)]))
+
+        # Assertions
+        self.assertTrue(all(result.ok for result in results))
+        # Only the counts of a batch are logged, not its operations
+        self.assertFalse(any("RecordOperation" in line for line in logs.output))
+        self.assertTrue(any("Applied 2 operations" in line for line in logs.output))
+        self.assertEqual(mock_delete.call_count, 2)
+        self.assertEqual(adapter._pool_maxsize, 3)
+        self.assertTrue(adapter._pool_block)
+
+    def test_record_operation_validation(self):
+        """
+        Test that incomplete operations are rejected when they are created.
+        """
+        with self.assertRaises(ValueError):
+            RecordOperation("rename", record={})
+        with self.assertRaises(ValueError):
+            RecordOperation(RecordOperation.UPDATE, record={})
+        with self.assertRaises(ValueError):
+            RecordOperation(RecordOperation.CREATE)
+
+    def test_single_flight_async_cancelled_caller(self):
+        """
+        Test that cancelling the task that started a shared call does not cancel it for the other callers.
+        """
+        single_flight = SingleFlight()
+        calls = []
+
+        async def slow_call():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "records"
+
+        async def run():
+            leader = asyncio.ensure_future(single_flight.do_async("key", slow_call))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(single_flight.do_async("key", slow_call))
+            await asyncio.sleep(0)
+            leader.cancel()
+            return await asyncio.gather(leader, follower, return_exceptions=True)
+
+        leader_result, follower_result = asyncio.run(run())
+
+        # Assertions
+        self.assertIsInstance(leader_result, asyncio.CancelledError)
+        self.assertEqual(follower_result, "records")
+        self.assertEqual(len(calls), 1)
+
+    def test_single_flight_shares_exception(self):
+        """
+        Test that an exception raised by the in-flight call is raised in every waiting caller.
+        """
+        single_flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def failing_call():
+            calls.append(1)
+            release.wait(5)
+            raise ConnectionError("boom")
+
+        errors = []
+        def caller():
+            try:
+                single_flight.do("key", failing_call)
+            except ConnectionError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=caller) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        # Assertions
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(errors), 3)
+
     @patch("namecom_update.requests.get")
     def test_get_external_ip(self, mock_get):
         """
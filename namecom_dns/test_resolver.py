@@ -0,0 +1,131 @@
+import os
+import requests
+import socket
+import ssl
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from unittest.mock import Mock, patch
+from urllib3.exceptions import NameResolutionError
+from namecom_dns.resolver import DNSCache, create_session
+
+
+class QuietHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Keep connections open between requests
+
+    def do_GET(self):
+        body = b"10.0.0.1"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+CERTIFICATE = os.path.join(os.path.dirname(__file__), "testdata", "myhost.example.pem") # Self-signed, for myhost.example
+
+
+class TestResolver(unittest.TestCase):
+
+    def start_server(self, tls=False):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), QuietHandler)
+        if tls:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(CERTIFICATE)
+            server.socket = context.wrap_socket(server.socket, server_side=True)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server.server_address[1]
+
+    def address_info(self, *addresses):
+        return [(socket.AF_INET6 if ":" in address else socket.AF_INET, socket.SOCK_STREAM, 6, "", (address, 443))
+                for address in addresses]
+
+    def test_dns_cache_lifetime(self):
+        """
+        Test that looked up addresses are reused until the cache lifetime expires.
+        """
+        getaddrinfo = Mock(return_value=self.address_info("2001:db8::1", "192.0.2.1", "192.0.2.1"))
+        cache = DNSCache(lifetime=300, getaddrinfo=getaddrinfo)
+
+        with patch("namecom_dns.resolver.time.monotonic", return_value=1000):
+            self.assertEqual(cache.resolve("api.name.com", 443), ["2001:db8::1", "192.0.2.1"])
+            self.assertEqual(cache.resolve("api.name.com", 443), ["2001:db8::1", "192.0.2.1"])
+        self.assertEqual(getaddrinfo.call_count, 1)
+
+        with patch("namecom_dns.resolver.time.monotonic", return_value=1300):
+            cache.resolve("api.name.com", 443)
+        self.assertEqual(getaddrinfo.call_count, 2)
+
+    def test_dns_cache_last_known_good(self):
+        """
+        Test that the last known address is used when a lookup fails, and that the failure is raised when there is none.
+        """
+        getaddrinfo = Mock(side_effect=[self.address_info("192.0.2.1"),
+                                        socket.gaierror("resolver down"),
+                                        socket.gaierror("resolver down")])
+        cache = DNSCache(lifetime=0, getaddrinfo=getaddrinfo)
+
+        self.assertEqual(cache.resolve("api.name.com", 443), ["192.0.2.1"])
+        self.assertEqual(cache.resolve("api.name.com", 443), ["192.0.2.1"])
+        with self.assertRaises(socket.gaierror):
+            cache.resolve("ipinfo.io", 443)
+
+    def test_session_resolves_through_cache(self):
+        """
+        Test that a session from create_session connects to the cached address and resolves the host name once.
+        """
+        port = self.start_server()
+        getaddrinfo = Mock(return_value=self.address_info("127.0.0.1"))
+        session = create_session(DNSCache(getaddrinfo=getaddrinfo))
+        self.addCleanup(session.close)
+
+        for _ in range(2):
+            response = session.get(f"http://ip.example.invalid:{port}/ip")
+            self.assertEqual(response.text, "10.0.0.1")
+        getaddrinfo.assert_called_once_with("ip.example.invalid", port, type=socket.SOCK_STREAM)
+
+    def test_session_tries_every_address(self):
+        """
+        Test that the next cached address is tried when connecting to the first one fails.
+        """
+        port = self.start_server()
+        # Nothing listens on 127.0.0.2, the server is bound to 127.0.0.1 only
+        getaddrinfo = Mock(return_value=self.address_info("127.0.0.2", "127.0.0.1"))
+        session = create_session(DNSCache(getaddrinfo=getaddrinfo))
+        self.addCleanup(session.close)
+
+        response = session.get(f"http://ip.example.invalid:{port}/ip")
+        self.assertEqual(response.text, "10.0.0.1")
+
+    def test_session_without_addresses(self):
+        """
+        Test that a lookup returning no addresses fails as a name resolution error.
+        """
+        session = create_session(DNSCache(getaddrinfo=Mock(return_value=[])))
+        self.addCleanup(session.close)
+
+        with self.assertRaises(requests.ConnectionError) as raised:
+            session.get("http://ip.example.invalid/ip")
+        self.assertIsInstance(raised.exception.args[0].reason, NameResolutionError)
+
+    def test_https_checks_certificate_of_host_name(self):
+        """
+        Test that over HTTPS the host name, not the cached address, is used for SNI and the certificate check.
+        """
+        port = self.start_server(tls=True)
+        getaddrinfo = Mock(return_value=self.address_info("127.0.0.1"))
+        session = create_session(DNSCache(getaddrinfo=getaddrinfo))
+        self.addCleanup(session.close)
+
+        response = session.get(f"https://myhost.example:{port}/ip", verify=CERTIFICATE)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.text, "10.0.0.1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,171 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+from namecom_dns.namecom import NameCom
+from namecom_dns.zonefile import export_zone, parse_zone, import_zone, format_record, read_journal, tokenize
+
+
+class TestZoneFile(unittest.TestCase):
+    API_USERNAME = "your-username"
+    API_TOKEN = "your-token"
+    DOMAIN = "example.com"
+
+    ZONE = """$ORIGIN example.com.
+$TTL 600
+; A comment line
+@       IN SOA ns1.name.com. hostmaster.example.com. (
+            2024010101 ; serial
+            3600 900 604800 300 )
+@           300 IN A     10.0.0.1
+www         IN  A     10.0.0.2 ; trailing comment
+            IN  AAAA  ::1
+mail.example.com.  IN  MX  10 mx.example.com.
+blog        CNAME www
+_sip._tcp   IN  SRV   1 5 5061 sip.example.org.
+@           IN  TXT   "v=spf1 include:example.org ~all" "; not a comment"
+"""
+
+    def make_namecom(self):
+        return NameCom(TestZoneFile.API_USERNAME, TestZoneFile.API_TOKEN, TestZoneFile.DOMAIN, "")
+
+    def test_parse_zone(self):
+        """
+        Test that a zone file with directives, comments, continuation lines, inherited owners and
+        the common record types is parsed into Name.com resource records.
+        """
+        records = list(parse_zone(io.StringIO(TestZoneFile.ZONE), TestZoneFile.DOMAIN))
+
+        # Assertions
+        self.assertEqual([number for number, record in records], [7, 8, 9, 10, 11, 12, 13])
+        self.assertEqual([record for number, record in records], [
+            {"host": "", "type": "A", "ttl": 300, "answer": "10.0.0.1"},
+            {"host": "www", "type": "A", "ttl": 600, "answer": "10.0.0.2"},
+            {"host": "www", "type": "AAAA", "ttl": 600, "answer": "::1"},
+            {"host": "mail", "type": "MX", "ttl": 600, "priority": 10, "answer": "mx.example.com"},
+            {"host": "blog", "type": "CNAME", "ttl": 600, "answer": "www.example.com"},
+            {"host": "_sip._tcp", "type": "SRV", "ttl": 600, "priority": 1, "answer": "5 5061 sip.example.org"},
+            {"host": "", "type": "TXT", "ttl": 600, "answer": "v=spf1 include:example.org ~all; not a comment"},
+        ])
+
+    @patch("namecom_dns.namecom.requests.Session.get")
+    def test_export_zone_round_trip(self, mock_get):
+        """
+        Test that export_zone follows the API pages and writes a zone file that parses back into the same records.
+        """
+        page1 = {"records": [
+            {"id": 1, "domainName": "example.com", "fqdn": "example.com.", "type": "A", "answer": "10.0.0.1", "ttl": 300},
+            {"id": 2, "domainName": "example.com", "host": "www", "fqdn": "www.example.com.", "type": "CNAME", "answer": "example.com", "ttl": 300},
+        ], "nextPage": 2, "lastPage": 2}
+        page2 = {"records": [
+            {"id": 3, "domainName": "example.com", "host": "", "type": "MX", "answer": "mx.example.com", "ttl": 300, "priority": 10},
+            {"id": 4, "domainName": "example.com", "host": "txt", "type": "TXT", "answer": 'say "hi"; bye', "ttl": 300},
+        ], "lastPage": 2}
+        responses = []
+        for page in (page1, page2):
+            mock_response = Mock()
+            mock_response.status_code = 200
+            mock_response.json.return_value = page
+            responses.append(mock_response)
+        mock_get.side_effect = responses
+
+        namecom_instance = self.make_namecom()
+        out = io.StringIO()
+        count = export_zone(namecom_instance, out)
+
+        # Assertions
+        self.assertEqual(count, 4)
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(mock_get.call_args_list[1][0][0],
+                         f"https://api.name.com/v4/domains/{TestZoneFile.DOMAIN}/records?perPage=1000&page=2")
+        records = [record for number, record in parse_zone(io.StringIO(out.getvalue()), TestZoneFile.DOMAIN)]
+        self.assertEqual(records, [
+            {"host": "", "type": "A", "ttl": 300, "answer": "10.0.0.1"},
+            {"host": "www", "type": "CNAME", "ttl": 300, "answer": "example.com"},
+            {"host": "", "type": "MX", "ttl": 300, "priority": 10, "answer": "mx.example.com"},
+            {"host": "txt", "type": "TXT", "ttl": 300, "answer": 'say "hi"; bye'},
+        ])
+
+    def test_import_zone_resumes_from_journal(self):
+        """
+        Test that import_zone records created lines in the journal, reports failures, and that a rerun
+        only retries the records that failed.
+        """
+        namecom_instance = self.make_namecom()
+        zone = "www IN A 10.0.0.1\nftp IN A 10.0.0.2\nmail IN A 10.0.0.3\n"
+        progress = Mock()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            journal_path = os.path.join(tmpdir, "import.journal")
+
+            # First run: the ftp record fails
+            with patch.object(namecom_instance, "create_resource_record",
+                              side_effect=lambda record: None if record["host"] == "ftp" else 1):
+                created, skipped, failed = import_zone(namecom_instance, io.StringIO(zone), workers=2,
+                                                       journal_path=journal_path, progress=progress)
+            self.assertEqual((created, skipped), (2, 0))
+            self.assertEqual(failed, [(2, {"host": "ftp", "type": "A", "ttl": 300, "answer": "10.0.0.2"})])
+            self.assertEqual(progress.call_count, 3)
+
+            # Second run: only the failed record is created
+            with patch.object(namecom_instance, "create_resource_record", return_value=1) as mock_create:
+                created, skipped, failed = import_zone(namecom_instance, io.StringIO(zone), workers=2,
+                                                       journal_path=journal_path)
+            self.assertEqual((created, skipped, failed), (1, 2, []))
+            mock_create.assert_called_once_with({"host": "ftp", "type": "A", "ttl": 300, "answer": "10.0.0.2"})
+
+    def test_import_zone_journals_records_in_flight_on_parse_error(self):
+        """
+        Test that records created before a parse error are journaled, so that a rerun does not create them again.
+        """
+        namecom_instance = self.make_namecom()
+        zone = "www IN A 10.0.0.1\nftp IN A 10.0.0.2\nmail IN A 10.0.0.3\n$INCLUDE other.zone\nvpn IN A 10.0.0.4\n"
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            journal_path = os.path.join(tmpdir, "import.journal")
+            with patch.object(namecom_instance, "create_resource_record", return_value=1) as mock_create:
+                with self.assertRaises(ValueError):
+                    import_zone(namecom_instance, io.StringIO(zone), workers=2, journal_path=journal_path)
+            self.assertEqual(mock_create.call_count, 3)
+
+            self.assertEqual(read_journal(journal_path), {
+                ("www", "A", "10.0.0.1", None), ("ftp", "A", "10.0.0.2", None), ("mail", "A", "10.0.0.3", None)})
+
+    def test_import_zone_journal_follows_edited_zone(self):
+        """
+        Test that a rerun with an edited zone file skips the records by content and not by line number.
+        """
+        namecom_instance = self.make_namecom()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            journal_path = os.path.join(tmpdir, "import.journal")
+            with patch.object(namecom_instance, "create_resource_record", return_value=1):
+                import_zone(namecom_instance, io.StringIO("www IN A 10.0.0.1\nftp IN A 10.0.0.2\n"), journal_path=journal_path)
+
+            # A record is inserted at the top, so the lines of the imported records move
+            zone = "vpn IN A 10.0.0.4\nwww IN A 10.0.0.1\nftp IN A 10.0.0.5\n"
+            with patch.object(namecom_instance, "create_resource_record", return_value=1) as mock_create:
+                created, skipped, failed = import_zone(namecom_instance, io.StringIO(zone), journal_path=journal_path)
+
+            # Assertions
+            self.assertEqual((created, skipped, failed), (2, 1, []))
+            self.assertEqual(sorted(call[0][0]["host"] for call in mock_create.call_args_list), ["ftp", "vpn"])
+
+    def test_long_txt_record(self):
+        """
+        Test that a TXT answer longer than 255 octets is written as several character strings and read back whole.
+        """
+        answer = "v=DKIM1; k=rsa; p=" + "A" * 380 + "é" * 10
+        line = format_record({"host": "mail._domainkey", "type": "TXT", "answer": answer, "ttl": 300})
+
+        strings = [token for token in tokenize(line) if token.startswith('"')]
+        self.assertEqual(len(strings), 2)
+        for string in strings:
+            self.assertLessEqual(len(string[1:-1].encode("utf-8")), 255)
+        records = [record for number, record in parse_zone(io.StringIO(line), TestZoneFile.DOMAIN)]
+        self.assertEqual(records[0]["answer"], answer)
+
+
+if __name__ == "__main__":
+    unittest.main()
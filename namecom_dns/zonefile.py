@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+# Description: Export and import whole zones as RFC 1035 master files (BIND zone files)
+
+from namecom_dns.namecom import NameCom
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import argparse
+import json
+import os
+import sys
+import logging
+
+# Create a logger object
+logger = logging.getLogger(__name__)
+# Set log level
+logger.setLevel(logging.INFO)
+
+DEFAULT_TTL = 300 # TTL of records that have none in the zone file, the lowest TTL Name.com accepts
+
+# Record types whose answer is a domain name, written with a trailing dot in the zone file
+NAME_TYPES = ("CNAME", "ANAME", "NS", "MX", "SRV")
+
+
+# RFC 1035 limits a character string to 255 octets, longer TXT answers are split into several strings
+MAX_STRING_OCTETS = 255
+
+
+def quote_txt(text):
+    """
+    Quote a TXT answer as RFC 1035 character strings of at most MAX_STRING_OCTETS octets each.
+    """
+    encoded = text.encode("utf-8")
+    strings = []
+    start = 0
+    while True:
+        end = min(start + MAX_STRING_OCTETS, len(encoded))
+        # Do not split a multi-byte character
+        while end < len(encoded) and encoded[end] & 0xC0 == 0x80:
+            end -= 1
+        chunk = encoded[start:end].decode("utf-8")
+        strings.append('"' + chunk.replace("\\", "\\\\").replace('"', '\\"') + '"')
+        start = end
+        if start >= len(encoded):
+            return " ".join(strings)
+
+
+def absolute_name(name):
+    if name.endswith("."):
+        return name
+    return name + "."
+
+
+def format_record(record):
+    """
+    Return a resource record from the Name.com API as one zone file line, with the owner relative to $ORIGIN.
+    """
+    owner = record.get("host") or "@"
+    ttl = record.get("ttl", DEFAULT_TTL)
+    rtype = record["type"]
+    answer = record.get("answer", "")
+
+    if rtype == "TXT":
+        rdata = quote_txt(answer)
+    elif rtype in ("MX", "SRV"):
+        # For SRV records the answer is "{weight} {port} {target}", the priority is held separately
+        fields = answer.split()
+        fields[-1] = absolute_name(fields[-1])
+        rdata = f"{record.get('priority', 0)} {' '.join(fields)}"
+    elif rtype in NAME_TYPES:
+        rdata = absolute_name(answer)
+    else:
+        rdata = answer
+    return f"{owner}\t{ttl}\tIN\t{rtype}\t{rdata}\n"
+
+
+def export_zone(namecom, out):
+    """
+    Stream all records of the domain of namecom into the file object out as a zone file.
+    Records are written page by page as they arrive from the API. Return the number of records written.
+    """
+    out.write(f"$ORIGIN {absolute_name(namecom.domain)}\n")
+    out.write(f"$TTL {DEFAULT_TTL}\n")
+    count = 0
+    for record in namecom.iter_records():
+        out.write(format_record(record))
+        count += 1
+    logger.info(f"Exported {count} records of {namecom.domain}")
+    return count
+
+
+def tokenize(line):
+    """
+    Split one zone file line into tokens. Comments are dropped, parentheses are separate tokens and
+    quoted strings are returned unescaped but still within their double quotes.
+    """
+    tokens = []
+    i = 0
+    while i < len(line):
+        char = line[i]
+        if char == ";":
+            break
+        if char.isspace():
+            i += 1
+        elif char in "()":
+            tokens.append(char)
+            i += 1
+        elif char == '"':
+            text = []
+            i += 1
+            while i < len(line) and line[i] != '"':
+                if line[i] == "\\":
+                    i += 1
+                text.append(line[i:i + 1])
+                i += 1
+            if i >= len(line):
+                raise ValueError(f"Unterminated quoted string: {line.strip()}")
+            tokens.append('"' + "".join(text) + '"')
+            i += 1
+        else:
+            end = i
+            while end < len(line) and not line[end].isspace() and line[end] not in '();"':
+                end += 1
+            tokens.append(line[i:end])
+            i = end
+    return tokens
+
+
+def logical_lines(lines):
+    """
+    Yield (line number, tokens) for each entry of a zone file, with comments removed and parenthesised
+    continuation lines joined. The line number is that of the first physical line of the entry.
+    """
+    pending = []
+    start = 0
+    depth = 0
+    for number, line in enumerate(lines, start=1):
+        tokens = tokenize(line)
+        if not pending:
+            start = number
+            # A blank owner is significant: the record inherits the previous owner
+            if tokens and line[:1] in (" ", "\t"):
+                pending.append("")
+        for token in tokens:
+            if token == "(":
+                depth += 1
+            elif token == ")":
+                depth -= 1
+            else:
+                pending.append(token)
+        if depth == 0 and pending:
+            yield start, pending
+            pending = []
+    if pending:
+        raise ValueError(f"Line {start}: unbalanced parentheses")
+
+
+def relative_host(name, origin):
+    """
+    Return the Name.com host for an owner name: relative to the origin, and "" for the apex.
+    """
+    if name == "@":
+        return ""
+    if not name.endswith("."):
+        return name
+    if name == origin:
+        return ""
+    if name.endswith("." + origin):
+        return name[:-len(origin) - 1]
+    raise ValueError(f"{name} is outside the zone {origin}")
+
+
+def relative_answer(name, origin):
+    if name == "@":
+        return origin.rstrip(".")
+    if name.endswith("."):
+        return name[:-1]
+    return f"{name}.{origin.rstrip('.')}"
+
+
+def parse_zone(lines, domain):
+    """
+    Parse a zone file incrementally. Yield (line number, resource record dict) ready for NameCom.create_resource_record.
+    SOA records are skipped, Name.com manages them.
+    """
+    origin = absolute_name(domain)
+    default_ttl = DEFAULT_TTL
+    owner = ""
+    for number, tokens in logical_lines(lines):
+        if tokens[0] == "$ORIGIN":
+            origin = absolute_name(tokens[1])
+            continue
+        if tokens[0] == "$TTL":
+            default_ttl = int(tokens[1])
+            continue
+        if tokens[0].startswith("$"):
+            raise ValueError(f"Line {number}: unsupported directive {tokens[0]}")
+
+        if tokens[0]:
+            owner = relative_host(tokens[0], origin)
+        fields = tokens[1:]
+
+        # TTL and class are both optional and may come in any order
+        ttl = default_ttl
+        while fields and (fields[0].isdigit() or fields[0].upper() == "IN"):
+            if fields[0].isdigit():
+                ttl = int(fields[0])
+            fields = fields[1:]
+        if len(fields) < 2:
+            raise ValueError(f"Line {number}: missing record type or data")
+
+        rtype = fields[0].upper()
+        rdata = fields[1:]
+        if rtype == "SOA":
+            continue
+
+        record = {"host": owner, "type": rtype, "ttl": ttl}
+        if rtype == "TXT":
+            record["answer"] = "".join(token[1:-1] if token.startswith('"') else token for token in rdata)
+        elif rtype in ("MX", "SRV"):
+            record["priority"] = int(rdata[0])
+            record["answer"] = " ".join(rdata[1:-1] + [relative_answer(rdata[-1], origin)])
+        elif rtype in NAME_TYPES:
+            record["answer"] = relative_answer(rdata[0], origin)
+        else:
+            record["answer"] = " ".join(rdata)
+        yield number, record
+
+
+def record_key(record):
+    """
+    Return what identifies a record in the journal: its host, type, answer and priority.
+    """
+    return (record["host"].lower(), record["type"], record["answer"], record.get("priority"))
+
+
+def read_journal(journal_path):
+    """
+    Return the set of record keys already imported, as recorded in the journal file.
+    """
+    if not journal_path or not os.path.exists(journal_path):
+        return set()
+    with open(journal_path) as journal:
+        return {tuple(json.loads(line)) for line in journal if line.strip()}
+
+
+def import_zone(namecom, lines, workers=8, journal_path=None, progress=None):
+    """
+    Create the records of a zone file in the domain of namecom.
+
+    The zone file is parsed incrementally and at most 2 * workers records are in flight at any time.
+    The host, type, answer and priority of every created record are appended to the journal file, so that
+    rerunning an import after a partial failure skips the records already created, even if the zone file was edited.
+    progress is called as progress(created, skipped, failed) after each record.
+    Return a tuple (created, skipped, failed) where failed is a list of (line number, record).
+    """
+    done = read_journal(journal_path)
+    created = 0
+    skipped = 0
+    failed = []
+    journal = open(journal_path, "a") if journal_path else None
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            in_flight = {}
+
+            def collect(futures):
+                nonlocal created
+                for future in futures:
+                    number, record = in_flight.pop(future)
+                    try:
+                        id = future.result()
+                    except Exception as e:
+                        logger.info(f"Error: Line {number}: {e}")
+                        id = None
+                    if id is None:
+                        failed.append((number, record))
+                    else:
+                        created += 1
+                        if journal:
+                            journal.write(json.dumps(record_key(record)) + "\n")
+                            journal.flush()
+                    if progress:
+                        progress(created, skipped, len(failed))
+
+            try:
+                for number, record in parse_zone(lines, namecom.domain):
+                    if record_key(record) in done:
+                        skipped += 1
+                        continue
+                    if len(in_flight) >= 2 * workers:
+                        finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        collect(finished)
+                    in_flight[executor.submit(namecom.create_resource_record, record)] = (number, record)
+            finally:
+                # Also when parsing fails, journal the records in flight so that a rerun does not create them again
+                collect(list(in_flight))
+    finally:
+        if journal:
+            journal.close()
+    logger.info(f"Imported zone {namecom.domain}: created={created} skipped={skipped} failed={len(failed)}")
+    return created, skipped, failed
+
+
+def main():
+    # Define and parse command-line arguments
+    parser = argparse.ArgumentParser(description="Export or import a name.com zone as a zone file")
+    parser.add_argument("command", choices=["export", "import"], help="Export the zone to FILE or import FILE into the zone")
+    parser.add_argument("file", help="Zone file, - for stdout/stdin")
+    parser.add_argument("-d", "--domain", required=True, help="Domain name")
+    parser.add_argument("-w", "--workers", type=int, default=8, help="Number of concurrent API requests when importing")
+    parser.add_argument("-j", "--journal", type=str, default=None, help="Journal file for resuming an interrupted import")
+
+    args = parser.parse_args()
+
+    # Name.com API credentials
+    APIUSERNAME_VAR = "NAMECOM_APIUSERNAME"
+    APITOKEN_VAR = "NAMECOM_APITOKEN"
+
+    api_username = os.environ.get(APIUSERNAME_VAR)
+    api_token = os.environ.get(APITOKEN_VAR)
+    if not api_username or not api_token:
+        print(f"Error: Environment variables {APIUSERNAME_VAR} and {APITOKEN_VAR} must be set.", file=sys.stderr)
+        sys.exit(1)
+
+    NameDotCom = NameCom(api_username, api_token, args.domain, "", connections=args.workers)
+
+    if args.command == "export":
+        if args.file == "-":
+            export_zone(NameDotCom, sys.stdout)
+        else:
+            with open(args.file, "w") as out:
+                export_zone(NameDotCom, out)
+        sys.exit(0)
+
+    def report(created, skipped, failed):
+        print(f"\rcreated={created} skipped={skipped} failed={failed}", end="", file=sys.stderr)
+
+    if args.file == "-":
+        created, skipped, failed = import_zone(NameDotCom, sys.stdin, args.workers, args.journal, report)
+    else:
+        with open(args.file) as zone:
+            created, skipped, failed = import_zone(NameDotCom, zone, args.workers, args.journal, report)
+    print(file=sys.stderr)
+    for number, record in failed:
+        print(f"Failed line {number}: {record}", file=sys.stderr)
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
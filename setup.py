@@ -16,12 +16,15 @@ setup(
     data_files=[('namecom_dns', ['namecom_dns.service'])],
     install_requires=[
         'requests',
+        'urllib3>=2',
         'argparse',
         'configparser',
     ],
     entry_points={
         'console_scripts': [
             'namecom_dns=namecom_dns.namecom_update:main',
+            'namecom_zone=namecom_dns.zonefile:main',
+            'namecom_acme=namecom_dns.acme:main',
         ],
     },
 )